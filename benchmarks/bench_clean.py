@@ -0,0 +1,137 @@
+"""
+Cleaning throughput: matches/sec, rows/sec and peak RSS of clean_matches.
+
+Usage:
+    python benchmarks/bench_clean.py [--matches 5000] [--presets default,full]
+        [--formats csv,parquet] [--workers 1,4] [--packed] [--raw-dir DIR]
+
+Writes a synthetic raw dataset (or uses --raw-dir), then runs one full
+rebuild per preset / format / worker count, each in a fresh interpreter
+so peak RSS is measured per run. "rss" is the main process, "worker
+rss" the largest pool process (workers > 1).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import write_matches  # noqa: E402
+
+
+def _max_rss_mib(who) -> float:
+    import resource
+
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _count_rows(out: Path) -> int:
+    rows = 0
+    for path in out.glob("matches_*/*.*"):
+        if path.suffix == ".csv":
+            with open(path, "rb") as f:
+                rows += sum(1 for _ in f) - 1
+        elif path.suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            rows += pq.ParquetFile(str(path)).metadata.num_rows
+        elif path.suffix == ".arrow":
+            import pyarrow as pa
+
+            with pa.memory_map(str(path)) as source:
+                reader = pa.ipc.open_file(source)
+                rows += sum(
+                    reader.get_batch(i).num_rows
+                    for i in range(reader.num_record_batches)
+                )
+    return rows
+
+
+def _child(raw_dir: Path, out: Path, preset: str, fmt: str, workers: int):
+    """Run one clean in this process and print its measurements as JSON."""
+    import resource
+
+    from tft_info_collector.clean_matches import clean_matches
+
+    start = time.perf_counter()
+    clean_matches(raw_dir, out, preset=preset, workers=workers, fmt=fmt, full_rebuild=True)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "elapsed": elapsed,
+        "rss": _max_rss_mib(resource.RUSAGE_SELF),
+        "worker_rss": _max_rss_mib(resource.RUSAGE_CHILDREN),
+    }))
+
+
+def _run(raw_dir: Path, out: Path, preset: str, fmt: str, workers: int) -> dict:
+    proc = subprocess.run(
+        [
+            sys.executable, __file__, "--child",
+            str(raw_dir), str(out), preset, fmt, str(workers),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        raw_dir, out, preset, fmt, workers = sys.argv[2:7]
+        return _child(Path(raw_dir), Path(out), preset, fmt, int(workers))
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--presets", default="default,full")
+    parser.add_argument("--formats", default="csv")
+    parser.add_argument("--workers", default="1")
+    parser.add_argument("--packed", action="store_true", help="raw data as a packed store")
+    parser.add_argument("--raw-dir", type=Path, help="clean this directory instead")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-clean-") as tmp:
+        tmp = Path(tmp)
+        raw_dir = args.raw_dir
+        if raw_dir is None:
+            raw_dir = tmp / "raw"
+            start = time.perf_counter()
+            n = write_matches(raw_dir, args.matches, args.seed, packed=args.packed)
+            print(f"generated {n} matches in {time.perf_counter() - start:.1f}s → {raw_dir}")
+
+        from tft_info_collector.clean_matches import list_matches
+
+        n_matches = len(list_matches(raw_dir))
+
+        print(
+            f"{'preset':<8} {'format':<8} {'workers':>7} {'seconds':>8} "
+            f"{'matches/s':>10} {'rows/s':>10} {'rows':>9} {'rss MiB':>8} {'worker rss':>10}"
+        )
+        for preset in args.presets.split(","):
+            for fmt in args.formats.split(","):
+                for workers in (int(w) for w in args.workers.split(",")):
+                    out = tmp / f"clean-{preset}-{fmt}-{workers}"
+                    result = _run(raw_dir, out, preset, fmt, workers)
+                    rows = _count_rows(out)
+                    elapsed = result["elapsed"]
+                    worker_rss = f"{result['worker_rss']:.0f}" if workers > 1 else "-"
+                    print(
+                        f"{preset:<8} {fmt:<8} {workers:>7} {elapsed:>8.2f} "
+                        f"{n_matches / elapsed:>10,.0f} {rows / elapsed:>10,.0f} "
+                        f"{rows:>9} {result['rss']:>8.0f} {worker_rss:>10}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
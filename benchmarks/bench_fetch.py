@@ -0,0 +1,133 @@
+"""
+Fetch throughput against the local mock Riot API (mock_riot.py).
+
+Usage:
+    python benchmarks/bench_fetch.py [--players 100] [--limit 20]
+        [--latency 0,0.05] [--error-rate 0,0.05] [--concurrency 1,4,16]
+
+For every latency / 429 rate / concurrency combination a fresh mock
+server is started in its own process, and fetch_matches runs from an
+empty working directory until every player's history is stored.
+Reports matches/sec, requests/sec and how many 429s were served.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("RIOT_API_KEY", "benchmark")
+
+
+@contextlib.contextmanager
+def mock_server(**options):
+    """Run mock_riot.py in a subprocess; yields its base URL."""
+    cmd = [sys.executable, str(HERE / "mock_riot.py"), "--port", "0"]
+    for name, value in options.items():
+        cmd += [f"--{name.replace('_', '-')}", str(value)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        yield proc.stdout.readline().strip()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _get(base: str, path: str):
+    with urllib.request.urlopen(base + path) as r:
+        return json.loads(r.read())
+
+
+def run_once(base: str, players: int, limit: int, concurrency: int) -> dict:
+    """Fetch every player's matches from `base` in a scratch directory."""
+    os.environ["RIOT_API_BASE"] = base
+    from tft_info_collector.config import settings
+    from tft_info_collector.fetch_matches import fetch_matches
+
+    settings.RIOT_API_BASE = base
+
+    puuids = []
+    for league in ("challenger", "grandmaster", "master"):
+        puuids += [e["puuid"] for e in _get(base, f"/tft/league/v1/{league}")["entries"]]
+    puuids = puuids[:players]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-fetch-") as tmp:
+        os.chdir(tmp)
+        try:
+            ids_file = Path("players.json")
+            ids_file.write_text(json.dumps({"platform": "na1", "players": puuids}))
+
+            log = io.StringIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(log):
+                asyncio.run(fetch_matches(
+                    ids_file,
+                    limit=limit,
+                    out_dir=Path("matches"),
+                    concurrency=concurrency,
+                    return_cached=False,
+                ))
+            elapsed = time.perf_counter() - start
+            matches = sum(1 for _ in Path("matches").glob("*.json"))
+        finally:
+            os.chdir(cwd)
+
+    stats = _get(base, "/__stats")
+    return {
+        "elapsed": elapsed,
+        "matches": matches,
+        "retries": log.getvalue().count("[rate-limit]"),
+        "failures": log.getvalue().count("[warn]"),
+        **stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20, help="matches per player")
+    parser.add_argument("--latency", default="0,0.05", help="seconds per request")
+    parser.add_argument("--error-rate", default="0,0.05", help="fraction of injected 429s")
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--app-limit", default="20000:1,1200000:600")
+    args = parser.parse_args()
+
+    print(
+        f"{'latency':>7} {'429 rate':>8} {'workers':>7} {'seconds':>8} {'matches':>7} "
+        f"{'matches/s':>9} {'req/s':>7} {'429s':>5} {'failed':>6}"
+    )
+    for latency in (float(x) for x in args.latency.split(",")):
+        for error_rate in (float(x) for x in args.error_rate.split(",")):
+            for concurrency in (int(x) for x in args.concurrency.split(",")):
+                with mock_server(
+                    players=args.players,
+                    latency=latency,
+                    error_rate=error_rate,
+                    retry_after=args.retry_after,
+                    app_limit=args.app_limit,
+                ) as base:
+                    r = run_once(base, args.players, args.limit, concurrency)
+                throttled = r["injected_429"] + r["limited_429"]
+                print(
+                    f"{latency:>7g} {error_rate:>8g} {concurrency:>7} {r['elapsed']:>8.2f} "
+                    f"{r['matches']:>7} {r['matches'] / r['elapsed']:>9,.1f} "
+                    f"{r['requests'] / r['elapsed']:>7,.0f} {throttled:>5} {r['failures']:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
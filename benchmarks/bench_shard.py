@@ -0,0 +1,101 @@
+"""
+Sharded fetching with several collector processes against the mock API.
+
+Usage:
+    python benchmarks/bench_shard.py [--nodes 1,2,4] [--players 200]
+        [--limit 20] [--latency 0.02] [--no-leases]
+
+For every node count a fresh mock server (mock_riot.py) is started, and
+that many `tft-collector fetch-matches --shard K/N` processes run at once
+from one players file, each into its own raw store, claiming match IDs
+through a shared lease file. The stores are then merged. Reports the wall
+time, the matches each node downloaded, and how many downloads were
+duplicates (0 with leases; without them, players of different shards
+share matches).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(HERE))
+
+os.environ.setdefault("RIOT_API_KEY", "benchmark")
+
+from bench_fetch import _get, mock_server  # noqa: E402
+
+CLI = "from tft_info_collector.cli import main; main()"
+
+
+def run_nodes(base: str, players: int, limit: int, nodes: int, leases: bool) -> dict:
+    from tft_info_collector.sharding import merge_stores
+
+    puuids = []
+    for league in ("challenger", "grandmaster", "master"):
+        puuids += [e["puuid"] for e in _get(base, f"/tft/league/v1/{league}")["entries"]]
+
+    with tempfile.TemporaryDirectory(prefix="bench-shard-") as tmp:
+        tmp = Path(tmp)
+        ids_file = tmp / "players.json"
+        ids_file.write_text(json.dumps({"platform": "na1", "players": puuids[:players]}))
+
+        env = {**os.environ, "RIOT_API_BASE": base}
+        procs = []
+        start = time.perf_counter()
+        for k in range(nodes):
+            cmd = [
+                sys.executable, "-c", CLI, "fetch-matches",
+                "-f", str(ids_file),
+                "-l", str(limit),
+                "-o", str(tmp / f"node-{k}" / "matches"),
+                "--shard", f"{k}/{nodes}",
+                "--node", f"node-{k}",
+            ]
+            if leases:
+                cmd += ["--leases", str(tmp / "leases.sqlite")]
+            procs.append(subprocess.Popen(
+                cmd, cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+            ))
+        for p in procs:
+            _, err = p.communicate()
+            if p.returncode:
+                raise RuntimeError(f"node failed:\n{err}")
+        elapsed = time.perf_counter() - start
+
+        stores = [tmp / f"node-{k}" / "matches" for k in range(nodes)]
+        per_node = [sum(1 for _ in s.glob("*.json")) for s in stores]
+        merged = merge_stores(stores, tmp / "merged")
+
+    return {"elapsed": elapsed, "per_node": per_node, "unique": merged}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", default="1,2,4", help="node counts to try")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20, help="matches per player")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    parser.add_argument("--no-leases", action="store_true", help="hash sharding only")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>5} {'seconds':>8} {'unique':>7} {'downloads':>9} {'dupes':>6}  per node")
+    for nodes in (int(x) for x in args.nodes.split(",")):
+        with mock_server(players=args.players, latency=args.latency) as base:
+            r = run_nodes(base, args.players, args.limit, nodes, not args.no_leases)
+        downloads = sum(r["per_node"])
+        print(
+            f"{nodes:>5} {r['elapsed']:>8.2f} {r['unique']:>7} {downloads:>9} "
+            f"{downloads - r['unique']:>6}  {r['per_node']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Local mock of the Riot TFT endpoints used by the collector.
+
+Serves, for a deterministic synthetic population of players and matches:
+    /tft/league/v1/{challenger,grandmaster,master}
+    /tft/match/v1/matches/by-puuid/{puuid}/ids   (start, count, startTime, endTime)
+    /tft/match/v1/matches/{match_id}
+
+Every response carries X-App-Rate-Limit / X-Method-Rate-Limit headers
+with honest counts, and requests over those limits get a 429 with
+Retry-After, like the real API. On top of that, latency and random 429s
+can be injected.
+
+Point the collector at it with RIOT_API_BASE=http://127.0.0.1:PORT.
+GET /__stats returns the request and 429 counters.
+
+Usage (standalone):
+    python benchmarks/mock_riot.py --port 8080 --latency 0.05 --error-rate 0.02
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import make_match, make_puuid  # noqa: E402
+from tft_info_collector.rate_limit import method_key, parse_rate_limits  # noqa: E402
+from tft_info_collector.utils import jsonlib  # noqa: E402
+
+LEAGUES = ("challenger", "grandmaster", "master")
+
+FIRST_GAME_MS = 1_700_000_000_000
+GAME_SPACING_MS = 60_000
+
+
+class _Window:
+    """Rolling request counter for one "count:seconds" limit."""
+
+    def __init__(self, limit: int, seconds: int):
+        self.limit = limit
+        self.seconds = seconds
+        self._hits = deque()
+
+    def wait(self, now: float) -> Optional[float]:
+        """Seconds until a request fits, or None if it fits now."""
+        while self._hits and self._hits[0] <= now - self.seconds:
+            self._hits.popleft()
+        if len(self._hits) >= self.limit:
+            return self._hits[0] + self.seconds - now
+        return None
+
+    def hit(self, now: float):
+        self._hits.append(now)
+
+    def count(self) -> int:
+        return len(self._hits)
+
+
+class MockRiot:
+    """
+    Synthetic Riot API state: players, their match histories and the
+    rate-limit windows. Match IDs run {platform}_{5000000000 + i}; newer
+    matches have higher numbers.
+    """
+
+    def __init__(
+        self,
+        players: int = 200,
+        matches_per_player: int = 40,
+        platform: str = "NA1",
+        seed: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        app_limit: str = "20000:1,1200000:600",
+        method_limit: str = "20000:10",
+    ):
+        rng = random.Random(seed)
+        self.platform = platform.upper()
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.app_limit = app_limit
+        self.method_limit = method_limit
+
+        self.puuids = [make_puuid(rng) for _ in range(players)]
+        n_matches = max(1, players * matches_per_player // 8)
+        self.participants: List[List[str]] = [
+            rng.sample(self.puuids, min(8, players)) for _ in range(n_matches)
+        ]
+        self.history: Dict[str, List[int]] = {p: [] for p in self.puuids}
+        for i in reversed(range(n_matches)):  # newest first, like Riot
+            for puuid in self.participants[i]:
+                self.history[puuid].append(i)
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed + 1)
+        self._app = [_Window(c, s) for c, s in parse_rate_limits(app_limit)]
+        self._methods: Dict[str, List[_Window]] = {}
+
+        self.requests = 0
+        self.injected_429 = 0
+        self.limited_429 = 0
+
+    # ---- data ----
+
+    def match_id(self, i: int) -> str:
+        return f"{self.platform}_{5_000_000_000 + i}"
+
+    def game_datetime(self, i: int) -> int:
+        return FIRST_GAME_MS + i * GAME_SPACING_MS
+
+    def league(self, name: str) -> Dict:
+        third = -(-len(self.puuids) // 3)
+        chunk = self.puuids[LEAGUES.index(name) * third:][:third]
+        return {
+            "tier": name.upper(),
+            "queue": "RANKED_TFT",
+            "entries": [
+                {"puuid": p, "leaguePoints": 1000 - i, "wins": 50, "losses": 50}
+                for i, p in enumerate(chunk)
+            ],
+        }
+
+    def match_ids(self, puuid: str, query: Dict[str, List[str]]) -> List[str]:
+        start = int(query.get("start", ["0"])[0])
+        count = int(query.get("count", ["20"])[0])
+        start_time = query.get("startTime")
+        end_time = query.get("endTime")
+
+        games = self.history.get(puuid, [])
+        if start_time:
+            games = [i for i in games if self.game_datetime(i) // 1000 >= int(start_time[0])]
+        if end_time:
+            games = [i for i in games if self.game_datetime(i) // 1000 <= int(end_time[0])]
+        return [self.match_id(i) for i in games[start:start + count]]
+
+    def match(self, match_id: str) -> Optional[Dict]:
+        platform, _, number = match_id.partition("_")
+        if platform != self.platform or not number.isdigit():
+            return None
+        i = int(number) - 5_000_000_000
+        if not 0 <= i < len(self.participants):
+            return None
+        data = make_match(random.Random(self.seed * 1_000_003 + i), match_id, self.participants[i])
+        data["info"]["game_datetime"] = self.game_datetime(i)
+        return data
+
+    # ---- rate limits ----
+
+    def admit(self, method: str) -> Dict[str, str]:
+        """
+        Count one request. Returns the response headers; "status" is set
+        to 429 when the request is throttled (over a limit or injected).
+        """
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            windows = self._methods.get(method)
+            if windows is None:
+                windows = self._methods[method] = [
+                    _Window(c, s) for c, s in parse_rate_limits(self.method_limit)
+                ]
+
+            headers = {}
+            for scope, group in (("application", self._app), ("method", windows)):
+                waits = [w for w in (b.wait(now) for b in group) if w is not None]
+                if waits:
+                    self.limited_429 += 1
+                    headers.update({
+                        "status": "429",
+                        "Retry-After": str(max(1, int(max(waits) + 0.999))),
+                        "X-Rate-Limit-Type": scope,
+                    })
+                    break
+            else:
+                for b in self._app + windows:
+                    b.hit(now)
+
+            if "status" not in headers and self._rng.random() < self.error_rate:
+                self.injected_429 += 1
+                headers.update({
+                    "status": "429",
+                    "Retry-After": f"{self.retry_after:g}",
+                    "X-Rate-Limit-Type": "method",
+                })
+
+            headers["X-App-Rate-Limit"] = self.app_limit
+            headers["X-App-Rate-Limit-Count"] = ",".join(
+                f"{b.count()}:{b.seconds}" for b in self._app
+            )
+            headers["X-Method-Rate-Limit"] = self.method_limit
+            headers["X-Method-Rate-Limit-Count"] = ",".join(
+                f"{b.count()}:{b.seconds}" for b in windows
+            )
+            return headers
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "injected_429": self.injected_429,
+                "limited_429": self.limited_429,
+            }
+
+    def delay(self) -> float:
+        if not self.latency and not self.jitter:
+            return 0.0
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        riot: MockRiot = self.server.riot
+        url = urlparse(self.path)
+        if url.path == "/__stats":  # benchmark bookkeeping, never throttled
+            return self._send(200, jsonlib.dumps(riot.stats()), {})
+
+        headers = riot.admit(method_key(url.path))
+
+        delay = riot.delay()
+        if delay:
+            time.sleep(delay)
+
+        if headers.pop("status", None):
+            body = jsonlib.dumps({"status": {"message": "Rate limit exceeded", "status_code": 429}})
+            return self._send(429, body, headers)
+
+        parts = url.path.strip("/").split("/")
+        payload = None
+        if parts[:3] == ["tft", "league", "v1"] and len(parts) == 4 and parts[3] in LEAGUES:
+            payload = riot.league(parts[3])
+        elif parts[:4] == ["tft", "match", "v1", "matches"]:
+            if len(parts) == 7 and parts[4] == "by-puuid" and parts[6] == "ids":
+                payload = riot.match_ids(parts[5], parse_qs(url.query))
+            elif len(parts) == 5:
+                payload = riot.match(parts[4])
+
+        if payload is None:
+            body = jsonlib.dumps({"status": {"message": "Data not found", "status_code": 404}})
+            return self._send(404, body, headers)
+        self._send(200, jsonlib.dumps(payload), headers)
+
+
+class MockRiotServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, riot: MockRiot, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.riot = riot
+
+    @property
+    def base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockRiotServer":
+        """Serve from a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Riot TFT API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--matches-per-player", type=int, default=40)
+    parser.add_argument("--platform", default="NA1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of injected 429s")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--app-limit", default="20000:1,1200000:600")
+    parser.add_argument("--method-limit", default="20000:10")
+    args = parser.parse_args()
+
+    riot = MockRiot(
+        players=args.players,
+        matches_per_player=args.matches_per_player,
+        platform=args.platform,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        app_limit=args.app_limit,
+        method_limit=args.method_limit,
+    )
+    server = MockRiotServer(riot, args.host, args.port)
+    print(server.base, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(
+            f"requests={riot.requests} injected_429={riot.injected_429} "
+            f"limited_429={riot.limited_429}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
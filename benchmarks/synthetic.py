@@ -0,0 +1,169 @@
+"""
+Synthetic Riot TFT match generator for benchmarks.
+
+Produces match-v1 shaped payloads: 8 participants, each with a board of
+units (star level, rarity, up to three items), active traits and
+augments. Output is deterministic for a given seed.
+
+Usage (write a raw match directory to clean):
+    python benchmarks/synthetic.py --matches 10000 --out data/bench/raw [--packed]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+SET_NUMBER = 14
+UNITS = [f"TFT{SET_NUMBER}_Champion{i:02d}" for i in range(60)]
+TRAITS = [f"TFT{SET_NUMBER}_Trait{i:02d}" for i in range(28)]
+ITEMS = [f"TFT_Item_Item{i:02d}" for i in range(45)]
+AUGMENTS = [f"TFT{SET_NUMBER}_Augment_Aug{i:03d}" for i in range(150)]
+
+
+def make_puuid(rng: random.Random) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+    return "".join(rng.choice(alphabet) for _ in range(78))
+
+
+def make_participant(rng: random.Random, puuid: str, placement: int) -> Dict:
+    level = rng.randint(6, 10)
+    units = []
+    for character_id in rng.sample(UNITS, rng.randint(level - 1, level + 1)):
+        units.append({
+            "character_id": character_id,
+            "itemNames": rng.sample(ITEMS, rng.choice((0, 0, 1, 2, 3, 3))),
+            "name": "",
+            "rarity": rng.randint(0, 6),
+            "tier": rng.choice((1, 2, 2, 2, 3)),
+        })
+
+    traits = []
+    for name in rng.sample(TRAITS, rng.randint(6, 12)):
+        tier_total = rng.randint(1, 4)
+        tier_current = rng.randint(0, tier_total)
+        traits.append({
+            "name": name,
+            "num_units": rng.randint(1, 9),
+            "style": tier_current and rng.randint(1, 4),
+            "tier_current": tier_current,
+            "tier_total": tier_total,
+        })
+
+    return {
+        "augments": rng.sample(AUGMENTS, 3),
+        "companion": {
+            "content_ID": f"{rng.getrandbits(64):016x}",
+            "item_ID": rng.randint(1, 9999),
+            "skin_ID": rng.randint(1, 60),
+            "species": "PetTFTAvatar",
+        },
+        "gold_left": rng.randint(0, 60),
+        "last_round": rng.randint(20, 45),
+        "level": level,
+        "missions": {"PlayerScore2": rng.randint(0, 200)},
+        "placement": placement,
+        "players_eliminated": rng.randint(0, 3),
+        "puuid": puuid,
+        "riotIdGameName": f"player{rng.randint(0, 10**6)}",
+        "riotIdTagline": "NA1",
+        "time_eliminated": rng.uniform(900.0, 2400.0),
+        "total_damage_to_players": rng.randint(0, 250),
+        "traits": traits,
+        "units": units,
+        "win": placement <= 4,
+    }
+
+
+def make_match(
+    rng: random.Random,
+    match_id: str,
+    puuids: List[str] = None,
+) -> Dict:
+    """One match. `puuids` (8 players) defaults to fresh random players."""
+    if puuids is None:
+        puuids = [make_puuid(rng) for _ in range(8)]
+    placements = list(range(1, len(puuids) + 1))
+    rng.shuffle(placements)
+
+    return {
+        "metadata": {
+            "data_version": "6",
+            "match_id": match_id,
+            "participants": list(puuids),
+        },
+        "info": {
+            "endOfGameResult": "GameComplete",
+            "gameCreation": 1_700_000_000_000 + rng.randint(0, 10**9),
+            "gameId": int(match_id.rsplit("_", 1)[-1]),
+            "game_datetime": 1_700_000_000_000 + rng.randint(0, 10**9),
+            "game_length": rng.uniform(1500.0, 2400.0),
+            "game_version": "Linux Version 14.24.1.1234",
+            "mapId": 22,
+            "participants": [
+                make_participant(rng, puuid, placement)
+                for puuid, placement in zip(puuids, placements)
+            ],
+            "queueId": 1100,
+            "queue_id": 1100,
+            "tft_game_type": "standard",
+            "tft_set_core_name": f"TFTSet{SET_NUMBER}",
+            "tft_set_number": SET_NUMBER,
+        },
+    }
+
+
+def generate_matches(
+    n: int,
+    seed: int = 0,
+    platform: str = "NA1",
+) -> Iterator[Dict]:
+    """Yield `n` matches with sequential IDs ({platform}_5000000000, ...)."""
+    rng = random.Random(seed)
+    for i in range(n):
+        yield make_match(rng, f"{platform}_{5_000_000_000 + i}")
+
+
+def write_matches(
+    out: Path,
+    n: int,
+    seed: int = 0,
+    platform: str = "NA1",
+    packed: bool = False,
+) -> int:
+    """
+    Write `n` synthetic matches to `out` as {match_id}.json files (the
+    fetch-matches layout), or into a packed store. Returns the count.
+    """
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from tft_info_collector.match_cache import MatchCache
+    from tft_info_collector.packed_store import PackedMatchStore
+
+    out.mkdir(parents=True, exist_ok=True)
+    store = PackedMatchStore(out) if packed else MatchCache(out)
+    try:
+        count = 0
+        for match in generate_matches(n, seed, platform):
+            store.put(match["metadata"]["match_id"], match)
+            count += 1
+    finally:
+        store.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic raw TFT matches.")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--platform", default="NA1")
+    parser.add_argument("--packed", action="store_true")
+    args = parser.parse_args()
+
+    count = write_matches(args.out, args.matches, args.seed, args.platform, args.packed)
+    print(f"Wrote {count} matches → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Placement statistics.
+
+Purpose:
+- Answer "how well does X place?" without loading the unit table into
+  pandas: games, average placement, top-4 rate and win rate per unit,
+  item, trait tier and unit + item combination.
+- Stream the input one match at a time. Memory grows with the number of
+  distinct keys (a few thousand at most), never with the number of rows.
+
+Input is either a `clean` output directory (any format, plain or
+dictionary-encoded; the participant, unit and trait tables of every
+matches_{region} partition are joined match by match) or a raw match
+directory / packed store, which is extracted on the fly.
+
+A key counts once per board: a player fielding two copies of a unit, or
+the same item twice, adds one game for it. Trait tiers only count when
+active (tier_current > 0).
+
+Group-by: every key gets a dense integer ID, and (ID, placement) pairs
+are buffered in flat arrays. Full buffers are folded into the per-key
+totals with numpy.bincount when numpy is installed, or a plain loop
+otherwise.
+
+Output (in `out`, one table per summary, most played first):
+    unit_stats        unit, games, avg_placement, top4_rate, win_rate
+    item_stats        item, ...
+    trait_stats       trait, tier, ...
+    unit_item_stats   unit, item, ...
+"""
+
+from array import array
+from itertools import chain, groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+from .clean_config import CLEAN_SCHEMAS, ENCODED_COLUMNS
+from .clean_manifest import MANIFEST_NAME, CleanManifest
+from .clean_matches import iter_payloads, list_matches, match_region
+from .extract import MatchExtractor
+from .metrics import metrics
+from .utils import jsonlib
+from .writers import EXTENSIONS, iter_table_rows, open_table_writer, read_table_columns
+
+try:
+    import numpy as np
+except ImportError:  # optional; the loop below does the same work
+    np = None
+
+BATCH_SIZE = 65536
+# Rows decoded at a time from each cleaned table (three are open at once)
+READ_BATCH_SIZE = 8192
+
+ITEM_SEP = ENCODED_COLUMNS["items"]["sep"]
+
+# Columns each input table must provide
+INPUT_COLUMNS = {
+    "participant": ["match_id", "puuid", "placement"],
+    "unit": ["match_id", "puuid", "unit_id", "items"],
+    "trait": ["match_id", "puuid", "trait_id", "tier_current"],
+}
+
+# summary table -> (key columns, dimension of each key column or None)
+SUMMARIES = {
+    "unit_stats": (["unit"], ["unit"]),
+    "item_stats": (["item"], ["item"]),
+    "trait_stats": (["trait", "tier"], ["trait", None]),
+    "unit_item_stats": (["unit", "item"], ["unit", "item"]),
+}
+
+STAT_COLUMNS = ["games", "avg_placement", "top4_rate", "win_rate"]
+
+
+class PlacementStats:
+    """Games, placement sum, top-4 finishes and wins per key."""
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.ids: Dict[Hashable, int] = {}
+        self.keys: List[Hashable] = []
+        self.games = array("q")
+        self.placement_sum = array("q")
+        self.top4 = array("q")
+        self.wins = array("q")
+        self._ids = array("q")
+        self._placements = array("q")
+
+    def add(self, keys: List[Hashable], placements: List[int]):
+        """Buffer one game per (key, placement) pair."""
+        ids = self.ids
+        for key in keys:
+            if key not in ids:
+                ids[key] = len(self.keys)
+                self.keys.append(key)
+        self._ids.extend(map(ids.__getitem__, keys))
+        self._placements.extend(placements)
+        if len(self._ids) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Fold the buffered (ID, placement) pairs into the totals."""
+        n = len(self.keys)
+        grow = n - len(self.games)
+        if grow:
+            for totals in (self.games, self.placement_sum, self.top4, self.wins):
+                totals.extend(array("q", bytes(8 * grow)))
+        if not self._ids:
+            return
+
+        if np is not None:
+            ids = np.frombuffer(self._ids, dtype=np.int64)
+            placements = np.frombuffer(self._placements, dtype=np.int64)
+            np.frombuffer(self.games, dtype=np.int64)[:] += np.bincount(ids, minlength=n)
+            np.frombuffer(self.placement_sum, dtype=np.int64)[:] += np.bincount(
+                ids, weights=placements, minlength=n
+            ).astype(np.int64)
+            np.frombuffer(self.top4, dtype=np.int64)[:] += np.bincount(
+                ids[placements <= 4], minlength=n
+            )
+            np.frombuffer(self.wins, dtype=np.int64)[:] += np.bincount(
+                ids[placements == 1], minlength=n
+            )
+            del ids, placements
+        else:
+            games, placement_sum = self.games, self.placement_sum
+            top4, wins = self.top4, self.wins
+            for i, placement in zip(self._ids, self._placements):
+                games[i] += 1
+                placement_sum[i] += placement
+                if placement <= 4:
+                    top4[i] += 1
+                    if placement == 1:
+                        wins[i] += 1
+
+        self._ids = array("q")
+        self._placements = array("q")
+
+    def rows(self, min_games: int = 1) -> Iterator[Tuple]:
+        """(key, games, avg placement, top-4 rate, win rate) per key."""
+        self.flush()
+        for i, key in enumerate(self.keys):
+            games = self.games[i]
+            if games < min_games:
+                continue
+            yield (
+                key,
+                games,
+                round(self.placement_sum[i] / games, 3),
+                round(self.top4[i] / games, 4),
+                round(self.wins[i] / games, 4),
+            )
+
+
+class Aggregator:
+    def __init__(self):
+        self.stats = {name: PlacementStats() for name in SUMMARIES}
+        self.matches = 0
+
+    def add_match(
+        self,
+        participants: Iterable[Tuple],
+        units: Iterable[Tuple],
+        traits: Iterable[Tuple],
+    ):
+        """
+        Add one match, given its (puuid, placement), (puuid, unit_id,
+        items) and (puuid, trait_id, tier_current) rows.
+        """
+        placements = {puuid: int(placement) for puuid, placement in participants if placement}
+
+        # (puuid, key) sets: each key counts once per board
+        unit_keys = set()
+        item_keys = set()
+        combo_keys = set()
+        for puuid, unit, items in units:
+            if puuid not in placements or unit in (None, ""):
+                continue
+            unit_keys.add((puuid, unit))
+            if items:
+                for item in str(items).split(ITEM_SEP):
+                    item_keys.add((puuid, item))
+                    combo_keys.add((puuid, (unit, item)))
+
+        trait_keys = set()
+        for puuid, trait, tier in traits:
+            tier = int(tier or 0)
+            if puuid in placements and tier > 0:
+                trait_keys.add((puuid, (trait, tier)))
+
+        for name, keys in (
+            ("unit_stats", unit_keys),
+            ("item_stats", item_keys),
+            ("unit_item_stats", combo_keys),
+            ("trait_stats", trait_keys),
+        ):
+            if keys:
+                self.stats[name].add(
+                    [key for _, key in keys],
+                    [placements[puuid] for puuid, _ in keys],
+                )
+
+        self.matches += 1
+
+
+# ----------------------------------------
+# Inputs
+# ----------------------------------------
+
+def _table_groups(fmt: str, path: Path, table: str) -> Iterator[Tuple[str, List[Tuple]]]:
+    """(match_id, rows) per match of a cleaned table, rows projected to
+    INPUT_COLUMNS[table] minus match_id."""
+    if not path.exists():
+        return
+    header = read_table_columns(fmt, path)
+    wanted = INPUT_COLUMNS[table]
+    missing = [col for col in wanted if col not in header]
+    if missing:
+        raise ValueError(
+            f"{path} lacks columns {missing}; re-run clean with a preset that keeps them"
+        )
+    project = itemgetter(*(header.index(col) for col in wanted[1:]))
+    rows = chain.from_iterable(iter_table_rows(fmt, path, READ_BATCH_SIZE))
+    for match_id, group in groupby(rows, key=itemgetter(header.index("match_id"))):
+        yield match_id, list(map(project, group))
+
+
+class _Groups:
+    """Consume match groups in step with another table's matches."""
+
+    def __init__(self, groups: Iterator[Tuple[str, List[Tuple]]]):
+        self._groups = groups
+        self._next = next(groups, None)
+
+    def take(self, match_id: str) -> List[Tuple]:
+        if self._next is None or self._next[0] != match_id:
+            return []
+        rows = self._next[1]
+        self._next = next(self._groups, None)
+        return rows
+
+    def exhausted(self) -> bool:
+        return self._next is None
+
+
+def _cleaned_matches(clean_dir: Path, fmt: str) -> Iterator[Tuple[List, List, List]]:
+    """
+    Join the participant, unit and trait tables of every partition match
+    by match. `clean` writes the tables of a partition in the same match
+    order, so the join needs one match of each table in memory.
+    """
+    ext = EXTENSIONS[fmt]
+    for part in sorted(p for p in clean_dir.glob("matches_*") if p.is_dir()):
+        units = _Groups(_table_groups(fmt, part / f"unit{ext}", "unit"))
+        traits = _Groups(_table_groups(fmt, part / f"trait{ext}", "trait"))
+        for match_id, participants in _table_groups(fmt, part / f"participant{ext}", "participant"):
+            yield participants, units.take(match_id), traits.take(match_id)
+        if not (units.exhausted() and traits.exhausted()):
+            raise ValueError(
+                f"tables in {part} are not in the same match order; "
+                "re-run clean with --full-rebuild"
+            )
+
+
+def _raw_matches(raw_dir: Path) -> Iterator[Tuple[List, List, List]]:
+    """Extract the needed columns straight from raw matches."""
+    extract = MatchExtractor(
+        {table: CLEAN_SCHEMAS[table] for table in INPUT_COLUMNS},
+        INPUT_COLUMNS,
+    )
+    for match_id, payload in iter_payloads(raw_dir, list(list_matches(raw_dir))):
+        tables = extract(jsonlib.loads(payload), match_region(match_id))
+        yield (
+            [r[1:] for r in tables["participant"]],
+            [r[1:] for r in tables["unit"]],
+            [r[1:] for r in tables["trait"]],
+        )
+
+
+def _dimension_values(clean_dir: Path, fmt: str, dimension: str) -> Dict[str, str]:
+    """{str(code): value} from a dim_{dimension} table of an encoded output."""
+    path = clean_dir / f"dim_{dimension}{EXTENSIONS[fmt]}"
+    if not path.exists():
+        return {}
+    return {
+        str(code): value
+        for code, value in chain.from_iterable(iter_table_rows(fmt, path))
+    }
+
+
+# ----------------------------------------
+# Entry point
+# ----------------------------------------
+
+def aggregate(
+    source: Path,
+    out: Path,
+    fmt: str = "csv",
+    min_games: int = 1,
+) -> Dict[str, int]:
+    """
+    Compute the placement summaries of `source` into `out`.
+
+    Parameters
+    ----------
+    source : Path
+        A clean output directory (recognised by its manifest), or a raw
+        match directory / packed store
+    out : Path
+        Directory for the summary tables
+    fmt : str
+        Output format: csv, parquet or arrow
+    min_games : int
+        Leave out keys seen in fewer games (mostly rare unit + item pairs)
+
+    Returns {summary table: rows written}.
+    """
+    aggregator = Aggregator()
+    decode: Dict[str, Dict[str, str]] = {}
+
+    if (source / MANIFEST_NAME).exists():
+        with CleanManifest(source / MANIFEST_NAME) as manifest:
+            meta = manifest.meta()
+        in_fmt = meta.get("format", "csv")
+        if meta.get("encode") == "dictionary":
+            decode = {
+                spec["dimension"]: _dimension_values(source, in_fmt, spec["dimension"])
+                for spec in ENCODED_COLUMNS.values()
+            }
+        matches = _cleaned_matches(source, in_fmt)
+    else:
+        matches = _raw_matches(source)
+
+    with metrics.timer("aggregate_seconds_total", phase="group"):
+        for participants, units, traits in matches:
+            aggregator.add_match(participants, units, traits)
+    metrics.inc("aggregate_matches_total", aggregator.matches)
+    print(f"[aggregate] {aggregator.matches} matches")
+
+    out.mkdir(parents=True, exist_ok=True)
+    written = {}
+    with metrics.timer("aggregate_seconds_total", phase="write"):
+        for name, (key_columns, dimensions) in SUMMARIES.items():
+            lookups = [decode.get(d, {}) if d else None for d in dimensions]
+            column_types = {
+                **{col: (int if d is None else str) for col, d in zip(key_columns, dimensions)},
+                "games": int,
+                "avg_placement": float,
+                "top4_rate": float,
+                "win_rate": float,
+            }
+            writer = open_table_writer(
+                fmt, out, name, key_columns + STAT_COLUMNS, column_types=column_types
+            )
+            rows = []
+            for key, *values in aggregator.stats[name].rows(min_games):
+                key = key if isinstance(key, tuple) else (key,)
+                key = tuple(
+                    int(k) if lookup is None else lookup.get(str(k), str(k))
+                    for k, lookup in zip(key, lookups)
+                )
+                rows.append(key + tuple(values))
+            # one row per key, so sorting in memory is cheap
+            rows.sort(key=lambda r: (-r[len(key_columns)], r[:len(key_columns)]))
+            try:
+                for start in range(0, len(rows), BATCH_SIZE):
+                    writer.write(rows[start:start + BATCH_SIZE])
+            finally:
+                writer.close()
+            written[name] = len(rows)
+    return written
@@ -7,7 +7,15 @@ Single source of truth for:
 
 Notes:
 - Paths support dot-notation and list expansion with [] (e.g. info.participants[].units[])
+- An empty path ("") means the match object itself (one row per match).
+- Field sources are a dotted path relative to the row's item, or one of:
+    {"from_root": path}    resolved against the match object
+    {"from_parent": path}  resolved against the enclosing list element
+    {"join": {"path": path, "sep": sep}}  list -> single string
+    "__region__"           filled by the cleaner from the match ID prefix
 - Use "join" to collapse lists into a single CSV cell.
+- Fields whose source key is listed in STRIP_PREFIX_FIELDS are normalized
+  to the suffix after the last underscore (TFT14_Ahri -> Ahri).
 """
 
 from __future__ import annotations
@@ -22,7 +30,7 @@ CLEAN_SCHEMAS = {
         "path": "",  # root match object
         "fields": {
             "match_id": "metadata.match_id",
-            "region": "__region__",  # optional: filled by cleaner if you pass region; otherwise blank
+            "region": "__region__",  # platform prefix of the match ID, filled by the cleaner
             "game_datetime": "info.game_datetime",
             "game_length": "info.game_length",
             "queue_id": "info.queue_id",
@@ -73,6 +81,19 @@ CLEAN_SCHEMAS = {
     },
 }
 
+# Riot identifiers that are stored without their set/category prefix.
+STRIP_PREFIX_FIELDS = {"character_id", "name", "itemNames"}
+
+# Categorical output columns that `clean --encode` replaces with integer
+# codes, and the dimension table (dim_{dimension}) each code refers to.
+# "sep" marks joined lists, which become joined codes ("3;17;22").
+ENCODED_COLUMNS = {
+    "puuid": {"dimension": "player"},
+    "unit_id": {"dimension": "unit"},
+    "trait_id": {"dimension": "trait"},
+    "items": {"dimension": "item", "sep": ";"},
+}
+
 # ----------------------------
 # 2) Presets (what to keep in output)
 # ----------------------------
@@ -0,0 +1,104 @@
+"""
+Clean manifest.
+
+Purpose:
+- Remember which raw matches (by match ID plus file mtime and size, or
+  packed record version) have already been cleaned into an output
+  directory, so `clean` only extracts new matches and appends their
+  rows to the existing outputs.
+- Remember the preset / format / partitioning the outputs were built
+  with; a mismatch means the outputs must be rebuilt from scratch.
+
+Stored as SQLite next to the cleaned tables (_clean_manifest.sqlite).
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_NAME = "_clean_manifest.sqlite"
+
+# (mtime_ns, size) for JSON files; (sequence, length) for packed records
+FileStat = Tuple[int, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS files (
+    match_id TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class CleanManifest:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT key, value FROM meta"))
+
+    def reset(self, meta: Dict[str, str]):
+        """Forget every cleaned file and start over with `meta`."""
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM files")
+            self._db.execute("DELETE FROM meta")
+            self._db.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", meta.items()
+            )
+
+    def cleaned(self) -> Dict[str, FileStat]:
+        return {
+            match_id: (mtime_ns, size)
+            for match_id, mtime_ns, size in self._db.execute(
+                "SELECT match_id, mtime_ns, size FROM files"
+            )
+        }
+
+    def add(self, stats: Iterable[Tuple[str, FileStat]]):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files (match_id, mtime_ns, size) VALUES (?, ?, ?)",
+                ((match_id, mtime_ns, size) for match_id, (mtime_ns, size) in stats),
+            )
+
+
+def plan_incremental(
+    manifest: CleanManifest,
+    meta: Dict[str, str],
+    stats: Dict[str, FileStat],
+) -> Optional[List[str]]:
+    """
+    Return the match IDs that still need cleaning, or None if the outputs
+    must be rebuilt (different preset/format, or a cleaned file changed).
+    """
+    current = manifest.meta()
+    if not current or any(current.get(k) != v for k, v in meta.items()):
+        return None
+
+    cleaned = manifest.cleaned()
+    for match_id, stat in cleaned.items():
+        if match_id in stats and stats[match_id] != stat:
+            print(f"[clean] {match_id} changed since it was cleaned; rebuilding")
+            return None
+
+    return [match_id for match_id in stats if match_id not in cleaned]
@@ -1,325 +1,400 @@
 from pathlib import Path
-import json
-import csv
-from typing import Dict, List, Any, Union, Callable
+from concurrent.futures import ProcessPoolExecutor
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from .clean_config import CLEAN_PRESETS, CLEAN_SCHEMAS
+from .clean_config import CLEAN_PRESETS, CLEAN_SCHEMAS, ENCODED_COLUMNS
+from .clean_manifest import MANIFEST_NAME, CleanManifest, plan_incremental
+from .encoding import DIMENSIONS_NAME, Dimensions, encoded_column_types
+from .extract import MatchExtractor
+from .metrics import metrics
+from .packed_store import PackedMatchStore, is_packed_store
+from .utils import jsonlib
+from .writers import (
+    EXTENSIONS,
+    FORMATS,
+    append_table_file,
+    merge_table_files,
+    open_table_writer,
+)
 
 
-def _strip_prefix(value: str) -> str:
+def _preset_columns(preset_cfg: Dict) -> Dict[str, List[str]]:
     """
-    Normalize Riot-style identifiers by keeping only the suffix
-    after the last underscore.
+    Resolve a preset into the ordered output columns of each table,
+    expanding "__all__" to every field of the table's schema.
+    """
+    columns = {}
+    for table_name, keep in preset_cfg.items():
+        if table_name not in CLEAN_SCHEMAS:
+            continue
+        if keep == "__all__":
+            keep = list(CLEAN_SCHEMAS[table_name]["fields"])
+        columns[table_name] = list(keep)
+    return columns
 
-    Examples:
-      TFT_Item_GuinsoosRageblade -> GuinsoosRageblade
-      TFT14_Ahri -> Ahri
-      TFT14_Trait_Sorcerer -> Sorcerer
+
+def list_matches(raw_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """
+    Match IDs available in `raw_dir`, in processing order, with the
+    version stamp the clean manifest tracks: (mtime_ns, size) for
+    {match_id}.json files, (sequence, length) for a packed store.
     """
-    if not value or not isinstance(value, str):
-        return ""
-    return value.rsplit("_", 1)[-1]
+    if is_packed_store(raw_dir):
+        with PackedMatchStore(raw_dir) as store:
+            return {mid: (seq, length) for mid, seq, length in store.entries()}
 
+    stats = {}
+    for json_file in sorted(raw_dir.glob("*.json")):
+        st = json_file.stat()
+        stats[json_file.stem] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+
+def iter_payloads(raw_dir: Path, match_ids: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """
+    (match_id, raw JSON) of the given matches, from a JSON directory or a
+    packed store (in storage order).
+    """
+    if is_packed_store(raw_dir):
+        with PackedMatchStore(raw_dir) as store:
+            yield from store.scan_raw(match_ids)
+        return
 
-def _normalize_items(unit: dict) -> str:
-    raw_items = unit.get("itemNames", [])
-    if not isinstance(raw_items, list):
-        return ""
-    return ";".join(
-        _strip_prefix(i) for i in raw_items if isinstance(i, str)
-    )
+    for match_id in match_ids:
+        yield match_id, (raw_dir / f"{match_id}.json").read_bytes()
 
 
-def _filter_columns(rows: List[Dict], keep):
-    if keep == "__all__":
-        return rows
-    if not rows:
-        return rows
-    return [
-        {k: row.get(k) for k in keep}
-        for row in rows
-    ]
+def match_region(match_id: str) -> str:
+    """Platform prefix of a match ID (NA1_123 -> NA1), or "unknown"."""
+    region, sep, _ = match_id.partition("_")
+    return region.upper() if sep and region else "unknown"
 
 
-def _get_from_path(obj: Any, path: Union[str, List[str]]) -> List[Any]:
+def _write_tables(
+    raw_dir: Path,
+    match_ids: List[str],
+    columns: Dict[str, List[str]],
+    out: Path,
+    fmt: str = "csv",
+    dims: Optional[Dimensions] = None,
+) -> List[str]:
     """
-    Traverse the obj according to the path, which can include list indicators '[]'.
-    Returns a list of matching objects.
+    Stream the rows of `match_ids` into out/matches_{region}/{table}.{ext}.
+    The region is taken from each match ID and also fills the
+    "__region__" fields, so a mixed-region directory is split into one
+    partition per region in a single pass. A table's file is created on
+    its first row; tables without rows produce no file.
+
+    With `dims`, categorical columns are dictionary-encoded on the way
+    (see encoding.py).
+
+    Time spent reading, decoding, extracting, encoding and writing is
+    added to the clean_seconds_total metric.
+
+    Returns the regions written, in order of first appearance.
     """
-    if isinstance(path, str):
-        path = path.split(".")
-    objs = [obj]
-    for part in path:
-        next_objs = []
-        if part.endswith("[]"):
-            key = part[:-2]
-            for o in objs:
-                val = o.get(key) if isinstance(o, dict) else None
-                if isinstance(val, list):
-                    next_objs.extend(val)
-        else:
-            key = part
-            for o in objs:
-                val = o.get(key) if isinstance(o, dict) else None
-                if val is not None:
-                    next_objs.append(val)
-        objs = next_objs
-        if not objs:
-            break
-    return objs
-
-
-def _extract_rows(match: Dict, schema: Dict) -> List[Dict]:
+    extract = MatchExtractor({t: CLEAN_SCHEMAS[t] for t in columns}, columns)
+    encoders = {t: dims.encoder(cols) for t, cols in columns.items()} if dims else {}
+    column_types = {t: encoded_column_types(cols) for t, cols in columns.items()} if dims else {}
+
+    writers: Dict[str, Dict] = {}  # region -> table -> writer
+    rows_written = dict.fromkeys(columns, 0)
+    perf = time.perf_counter
+    read_s = decode_s = extract_s = encode_s = write_s = 0.0
+    n_matches = 0
+    try:
+        t0 = perf()
+        for match_id, payload in iter_payloads(raw_dir, match_ids):
+            t1 = perf()
+            match = jsonlib.loads(payload)
+            t2 = perf()
+            region = match_region(match_id)
+            tables = extract(match, region)
+            t3 = perf()
+            read_s += t1 - t0
+            decode_s += t2 - t1
+            extract_s += t3 - t2
+            n_matches += 1
+
+            region_writers = writers.get(region)
+            if region_writers is None:
+                region_writers = writers[region] = {}
+                (out / f"matches_{region}").mkdir(parents=True, exist_ok=True)
+
+            if encoders:
+                tables = {t: encoders[t](rows) for t, rows in tables.items()}
+                t4 = perf()
+                encode_s += t4 - t3
+                t3 = t4
+
+            for table_name, rows in tables.items():
+                if not rows:
+                    continue
+
+                writer = region_writers.get(table_name)
+                if writer is None:
+                    writer = open_table_writer(
+                        fmt,
+                        out / f"matches_{region}",
+                        table_name,
+                        columns[table_name],
+                        column_types=column_types.get(table_name),
+                    )
+                    region_writers[table_name] = writer
+
+                writer.write(rows)
+                rows_written[table_name] += len(rows)
+
+            t0 = perf()
+            write_s += t0 - t3
+    finally:
+        t0 = perf()
+        for region_writers in writers.values():
+            for writer in region_writers.values():
+                writer.close()
+        write_s += perf() - t0
+
+        metrics.inc("clean_matches_total", n_matches)
+        for table_name, n in rows_written.items():
+            metrics.inc("clean_rows_total", n, table=table_name)
+        for phase, seconds in (
+            ("read", read_s), ("decode", decode_s), ("extract", extract_s),
+            ("encode", encode_s), ("write", write_s),
+        ):
+            if seconds:
+                metrics.inc("clean_seconds_total", seconds, phase=phase)
+
+    return list(writers)
+
+
+def _clean_shard(args) -> Tuple[List[str], Dict]:
     """
-    Extract rows from a match dict according to the schema.
-    schema keys:
-      - path: dotted path string or list of strings to locate list of items
-      - fields: dict of output column -> source field name or callable taking item and match
+    Process-pool entry point: partial table files for one shard. Returns
+    the shard's regions and metrics for the parent to merge.
+    """
+    raw_dir, match_ids, columns, out, fmt = args
+    metrics.reset()
+    regions = _write_tables(raw_dir, match_ids, columns, out, fmt)
+    return regions, metrics.snapshot()
+
+
+def _clean_parallel(
+    raw_dir: Path,
+    match_ids: List[str],
+    columns: Dict[str, List[str]],
+    out: Path,
+    workers: int,
+    fmt: str = "csv",
+    dims: Optional[Dimensions] = None,
+) -> List[str]:
     """
-    rows = []
-    path = schema.get("path", "")
-    fields = schema.get("fields", {})
-
-    match_id = match.get("metadata", {}).get("match_id")
-
-    # Handle participant-nested paths explicitly
-    if isinstance(path, str):
-        path_str = path
-    else:
-        path_str = ".".join(path)
-
-    if path_str.startswith("info.participants[]"):
-        participants = match.get("info", {}).get("participants", [])
-        # Determine if we are extracting participants themselves, or nested units/traits
-        if path_str == "info.participants[]":
-            # Extract participant-level rows
-            for participant in participants:
-                row = {}
-                for col, source in fields.items():
-                    if col == "match_id":
-                        row[col] = match_id
+    Shard `match_ids` into contiguous chunks, extract each chunk in a
+    worker process into its own partial table files, then concatenate
+    the partials of each region in chunk order. The result matches a
+    single-process run over the same match list.
+
+    With `dims`, workers write plain partials and the rows are encoded
+    here while merging, so codes are only ever assigned in one process.
+
+    Returns the regions, like _write_tables.
+    """
+    n_chunks = min(len(match_ids), workers * 4)
+    size = -(-len(match_ids) // n_chunks)
+    chunks = [match_ids[i:i + size] for i in range(0, len(match_ids), size)]
+
+    out.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".clean-", dir=out) as tmp:
+        shard_dirs = [Path(tmp) / f"shard-{i:04d}" for i in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            regions: Dict[str, None] = {}
+            for shard_regions, shard_metrics in pool.map(
+                _clean_shard,
+                [
+                    (raw_dir, chunk, columns, d, fmt)
+                    for chunk, d in zip(chunks, shard_dirs)
+                ],
+            ):
+                regions.update(dict.fromkeys(shard_regions))
+                metrics.merge(shard_metrics)
+
+        ext = EXTENSIONS[fmt]
+        encoders = {t: dims.encoder(cols) for t, cols in columns.items()} if dims else {}
+        with metrics.timer("clean_seconds_total", phase="merge"):
+            for region in regions:
+                final_dir = out / f"matches_{region}"
+                final_dir.mkdir(parents=True, exist_ok=True)
+
+                for table_name, cols in columns.items():
+                    partials = [
+                        d / f"matches_{region}" / f"{table_name}{ext}"
+                        for d in shard_dirs
+                    ]
+                    partials = [p for p in partials if p.exists()]
+                    if not partials:
                         continue
-                    if callable(source):
-                        try:
-                            row[col] = source(participant, match)
-                        except Exception:
-                            row[col] = None
-                    elif isinstance(source, str):
-                        if "." in source:
-                            val = participant
-                            for part in source.split("."):
-                                if isinstance(val, dict):
-                                    val = val.get(part)
-                                else:
-                                    val = None
-                                    break
-                            row[col] = val
-                        else:
-                            row[col] = participant.get(source)
-                    else:
-                        row[col] = None
-                rows.append(row)
-        elif path_str == "info.participants[].units[]":
-            # Extract units nested inside participants, injecting participant context
-            for participant in participants:
-                puuid = participant.get("puuid")
-                units = participant.get("units", [])
-                for unit in units:
-                    row = {}
-                    for col, source in fields.items():
-                        if col == "match_id":
-                            row[col] = match_id
-                            continue
-                        if col == "puuid":
-                            row[col] = puuid
-                            continue
-                        if col == "items":
-                            row[col] = _normalize_items(unit)
-                            continue
-                        if callable(source):
-                            try:
-                                row[col] = source(unit, match)
-                            except Exception:
-                                row[col] = None
-                        elif isinstance(source, str):
-                            if "." in source:
-                                val = unit
-                                for part in source.split("."):
-                                    if isinstance(val, dict):
-                                        val = val.get(part)
-                                    else:
-                                        val = None
-                                        break
-                                if source in ("character_id", "name"):
-                                    row[col] = _strip_prefix(val) if isinstance(val, str) else val
-                                else:
-                                    row[col] = val
-                            else:
-                                val = unit.get(source)
-                                if source in ("character_id", "name"):
-                                    row[col] = _strip_prefix(val) if isinstance(val, str) else val
-                                else:
-                                    row[col] = val
-                        else:
-                            row[col] = None
-                    rows.append(row)
-        elif path_str == "info.participants[].traits[]":
-            # Extract traits nested inside participants, injecting participant context
-            for participant in participants:
-                puuid = participant.get("puuid")
-                traits = participant.get("traits", [])
-                for trait in traits:
-                    row = {}
-                    for col, source in fields.items():
-                        if col == "match_id":
-                            row[col] = match_id
-                            continue
-                        if col == "puuid":
-                            row[col] = puuid
-                            continue
-                        if callable(source):
-                            try:
-                                row[col] = source(trait, match)
-                            except Exception:
-                                row[col] = None
-                        elif isinstance(source, str):
-                            if "." in source:
-                                val = trait
-                                for part in source.split("."):
-                                    if isinstance(val, dict):
-                                        val = val.get(part)
-                                    else:
-                                        val = None
-                                        break
-                                if source == "name":
-                                    row[col] = _strip_prefix(val) if isinstance(val, str) else val
-                                else:
-                                    row[col] = val
-                            else:
-                                val = trait.get(source)
-                                if source == "name":
-                                    row[col] = _strip_prefix(val) if isinstance(val, str) else val
-                                else:
-                                    row[col] = val
-                        else:
-                            row[col] = None
-                    rows.append(row)
+
+                    merge_table_files(
+                        fmt,
+                        partials,
+                        final_dir / f"{table_name}{ext}",
+                        table_name,
+                        cols,
+                        column_types=encoded_column_types(cols) if dims else None,
+                        transform=encoders.get(table_name),
+                    )
+
+    return list(regions)
+
+
+def _publish(
+    src_dir: Path,
+    dest_dir: Path,
+    columns: Dict[str, List[str]],
+    fmt: str,
+    append: bool,
+    encoded: bool = False,
+):
+    """Move freshly written table files into place, or append them."""
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    ext = EXTENSIONS[fmt]
+    for table_name, cols in columns.items():
+        part = src_dir / f"{table_name}{ext}"
+        if not part.exists():
+            continue
+        dest = dest_dir / part.name
+        if append:
+            append_table_file(
+                fmt,
+                part,
+                dest,
+                table_name,
+                cols,
+                column_types=encoded_column_types(cols) if encoded else None,
+            )
         else:
-            # For other participant nested paths, fallback to generic _get_from_path
-            items = _get_from_path(match, path)
-            if not items:
-                return rows
-            for item in items:
-                row = {}
-                for col, source in fields.items():
-                    if col == "match_id":
-                        row[col] = match_id
-                        continue
-                    if callable(source):
-                        try:
-                            row[col] = source(item, match)
-                        except Exception:
-                            row[col] = None
-                    elif isinstance(source, str):
-                        if "." in source:
-                            val = item
-                            for part in source.split("."):
-                                if isinstance(val, dict):
-                                    val = val.get(part)
-                                else:
-                                    val = None
-                                    break
-                            row[col] = val
-                        else:
-                            row[col] = item.get(source)
-                    else:
-                        row[col] = None
-                rows.append(row)
-    else:
-        # Non-participant tables: use generic extraction
-        items = _get_from_path(match, path)
-        if not items:
-            return rows
-        for item in items:
-            row = {}
-            for col, source in fields.items():
-                if col == "match_id":
-                    row[col] = match_id
-                    continue
-                if callable(source):
-                    try:
-                        row[col] = source(item, match)
-                    except Exception:
-                        row[col] = None
-                elif isinstance(source, str):
-                    if "." in source:
-                        val = item
-                        for part in source.split("."):
-                            if isinstance(val, dict):
-                                val = val.get(part)
-                            else:
-                                val = None
-                                break
-                        row[col] = val
-                    else:
-                        row[col] = item.get(source)
-                else:
-                    row[col] = None
-            rows.append(row)
+            os.replace(part, dest)
+
 
-    return rows
+def _clear_partitions(out: Path):
+    """
+    Remove every matches_{region} partition in `out` before a rebuild,
+    so regions (or tables) the new output lacks do not linger.
+    """
+    for part in out.glob("matches_*"):
+        if part.is_dir():
+            shutil.rmtree(part)
 
 
 def clean_matches(
     raw_dir: Path,
     out: Path,
     preset: str = "default",
+    workers: int = 1,
+    fmt: str = "csv",
+    full_rebuild: bool = False,
+    encode: bool = False,
 ):
     """
-    Read raw match JSON files, extract normalized tables,
-    apply cleaning preset, and write CSVs.
+    Read raw match JSON files (or a packed store, see packed_store.py),
+    extract normalized tables, apply cleaning preset, and write CSVs
+    (or parquet / arrow files, see writers.py).
 
-    Output: one CSV per table.
-    """
-    if preset not in CLEAN_PRESETS:
-        raise ValueError(f"Unknown preset: {preset}")
+    Rows are streamed: each match is extracted and its rows are written
+    to the open per-table writers straight away, so memory use does
+    not grow with the size of the dataset.
 
-    preset_cfg = CLEAN_PRESETS[preset]
+    With workers > 1 the files are sharded across a process pool and the
+    partial outputs are merged in file order, so the result matches a
+    single-process run.
 
-    tables = {table_name: [] for table_name in CLEAN_SCHEMAS}
+    Cleaning is incremental: a manifest in `out` records every cleaned
+    match (ID plus file mtime/size or packed record version), and later
+    runs only extract new matches and append their rows to the existing
+    tables. The outputs are rebuilt from scratch when `full_rebuild` is
+    set, when the preset or format changed, or when an already cleaned
+    match changed on disk; a rebuild replaces every matches_{region}
+    partition in `out`, including those of regions no longer present.
 
-    region = None
-    for json_file in raw_dir.glob("*.json"):
-        with open(json_file, "r") as f:
-            match = json.load(f)
+    Each match is routed by the region prefix of its ID, so a directory
+    mixing regions produces one matches_{region} partition per region.
 
-        if region is None:
-            match_id = match.get("metadata", {}).get("match_id", "")
-            if match_id and "_" in match_id:
-                region = match_id.split("_")[0]
-            else:
-                region = "unknown"
+    With `encode`, player / unit / trait / item columns are written as
+    integer codes, with dim_{dimension} lookup tables in `out` whose codes
+    stay stable across incremental runs (see encoding.py).
 
-        for table_name, schema in CLEAN_SCHEMAS.items():
-            extracted_rows = _extract_rows(match, schema)
-            tables[table_name].extend(extracted_rows)
+    Output: one file per table and region.
+    """
+    if preset not in CLEAN_PRESETS:
+        raise ValueError(f"Unknown preset: {preset}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (expected one of {FORMATS})")
+
+    columns = _preset_columns(CLEAN_PRESETS[preset])
+    stats = list_matches(raw_dir)
+    match_ids = list(stats)
 
-    out = out / f"matches_{region}"
     out.mkdir(parents=True, exist_ok=True)
+    # "partition" marks outputs split by match-ID region (older outputs
+    # took the region of the first file and must be rebuilt)
+    meta = {
+        "preset": preset,
+        "format": fmt,
+        "partition": "match_id",
+        "encode": "dictionary" if encode else "none",
+    }
 
-    # ---- apply presets + write csv ----
-    for table_name, rows in tables.items():
-        if table_name not in preset_cfg:
-            continue
+    with CleanManifest(out / MANIFEST_NAME) as manifest:
+        todo = None if full_rebuild else plan_incremental(manifest, meta, stats)
+        append = todo is not None
+        if append:
+            todo = set(todo)
+            match_ids = [m for m in match_ids if m in todo]
+            if not match_ids:
+                print("[clean] no new matches")
+                return True
+            print(f"[clean] {len(match_ids)} new matches")
 
-        filtered = _filter_columns(rows, preset_cfg[table_name])
-        if not filtered:
-            continue
+        dims = Dimensions(out / DIMENSIONS_NAME) if encode else None
+        try:
+            with tempfile.TemporaryDirectory(prefix=".clean-", dir=out) as tmp:
+                tmp = Path(tmp)
+                if workers > 1 and len(match_ids) > 1:
+                    regions = _clean_parallel(
+                        raw_dir, match_ids, columns, tmp, workers, fmt, dims
+                    )
+                else:
+                    regions = _write_tables(raw_dir, match_ids, columns, tmp, fmt, dims)
+
+                with metrics.timer("clean_seconds_total", phase="publish"):
+                    if not append:
+                        _clear_partitions(out)
+                    for region in regions:
+                        _publish(
+                            tmp / f"matches_{region}",
+                            out / f"matches_{region}",
+                            columns,
+                            fmt,
+                            append,
+                            encoded=encode,
+                        )
+                    if dims:
+                        dims.write_tables(out, fmt, [
+                            ENCODED_COLUMNS[col]["dimension"]
+                            for col in dict.fromkeys(c for cols in columns.values() for c in cols)
+                            if col in ENCODED_COLUMNS
+                        ])
+        finally:
+            if dims:
+                dims.close()
 
-        out_path = out / f"{table_name}.csv"
-        with open(out_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=filtered[0].keys())
-            writer.writeheader()
-            writer.writerows(filtered)
+        if not append:
+            manifest.reset(meta)
+        manifest.add((m, stats[m]) for m in match_ids)
 
-    return True
\ No newline at end of file
+    return True
@@ -1,44 +1,114 @@
 import typer
 from pathlib import Path
-import json
+from typing import List, Optional
 import asyncio
 
-from .fetch_puuids import collect_players
-from .fetch_matches import fetch_matches
+from .aggregate import aggregate
+from .fetch_puuids import collect_players_many
+from .fetch_matches import PROGRESS_PATH, fetch_matches, load_players_file
 from .clean_matches import clean_matches
+from .collect import collect, group_by_region
+from .crawl import crawl
+from .metrics import metrics
+from .packed_store import PackedMatchStore, pack_directory
+from .sharding import LeaseBoard, merge_stores, parse_shard
+from .utils import jsonlib
+from .utils.routing import platform_to_region
+from .writers import FORMATS
 
 app = typer.Typer(help="TFT data collection CLI")
 
+METRICS_FORMATS = ("json", "prometheus")
+
+
+@app.callback()
+def main_callback(
+    ctx: typer.Context,
+    metrics_out: Optional[Path] = typer.Option(
+        None,
+        "--metrics",
+        help="Write a metrics summary here when the command ends ('-' for stdout)",
+    ),
+    metrics_format: str = typer.Option(
+        "json", "--metrics-format", help="Metrics format: json or prometheus"
+    ),
+):
+    """
+    TFT data collection CLI.
+    """
+    if metrics_format not in METRICS_FORMATS:
+        raise typer.BadParameter(
+            f"expected one of {', '.join(METRICS_FORMATS)}", param_hint="--metrics-format"
+        )
+    if metrics_out is None:
+        return
+
+    metrics.reset()
+    command = ctx.invoked_subcommand
+
+    def export():
+        if metrics_format == "prometheus":
+            text = metrics.prometheus()
+        else:
+            text = jsonlib.dumps(metrics.summary(command=command), pretty=True).decode() + "\n"
+        if str(metrics_out) == "-":
+            typer.echo(text, nl=False)
+        else:
+            metrics_out.parent.mkdir(parents=True, exist_ok=True)
+            metrics_out.write_text(text)
+
+    ctx.call_on_close(export)
+
 
 @app.command("fetch-ids")
 def fetch_ids_cmd(
-    platform: str = typer.Option(
-        "na1", "--platform", "-p", help="Platform shard (na1, euw1, kr, etc)"
+    platforms: List[str] = typer.Option(
+        ["na1"],
+        "--platform",
+        "-p",
+        help="Platform shard (na1, euw1, kr, etc); repeat for several",
     ),
     count: int = typer.Option(
-        500, "--count", "-c", help="Number of players to fetch"
+        500, "--count", "-c", help="Number of players to fetch per platform"
     ),
     out: Path = typer.Option(
         Path("data/raw/players.json"),
         "--out",
         "-o",
-        help="Output JSON path",
+        help="Output JSON path (players_{platform}.json next to it for several platforms)",
     ),
 ):
     """
     Fetch high-elo TFT player PUUIDs.
     """
-    players = collect_players(platform, count)
+    for platform in platforms:
+        try:
+            platform_to_region(platform)
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--platform")
+
+    players_by_platform = asyncio.run(collect_players_many(platforms, count))
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    payload = {
-        "platform": platform,
-        "players": players,
-    }
+    several = len({p.lower() for p in platforms}) > 1
+    for platform, players in players_by_platform.items():
+        path = out
+        if several:
+            path = out.with_name(f"{out.stem}_{platform}{out.suffix}")
+
+        payload = {
+            "platform": platform,
+            "players": players,
+        }
+
+        jsonlib.write_json(path, payload, pretty=True)
 
-    out.write_text(json.dumps(payload, indent=2))
+        typer.echo(f"Saved {len(players)} players → {path}")
 
-    typer.echo(f"Saved {len(players)} players → {out}")
+    failed = sorted({p.lower() for p in platforms} - set(players_by_platform))
+    if failed:
+        typer.echo(f"Failed to fetch players for: {', '.join(failed)}", err=True)
+        raise typer.Exit(1)
 
 
 @app.command("fetch-matches")
@@ -52,17 +122,213 @@ def fetch_matches_cmd(
     limit: int = typer.Option(
         20, "--limit", "-l", help="Matches per player"
     ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-j", min=1, help="Concurrent match-detail fetches"
+    ),
+    packed: bool = typer.Option(
+        False, "--packed", help="Store matches in compressed segment files"
+    ),
+    out: Path = typer.Option(
+        Path("data/raw/matches"),
+        "--out",
+        "-o",
+        help="Raw match directory; the fetch log is kept next to it",
+    ),
+    shard: Optional[str] = typer.Option(
+        None, "--shard", help="K/N: only fetch players of shard K (0-based) of N"
+    ),
+    leases: Optional[Path] = typer.Option(
+        None, "--leases", help="Shared SQLite file for claiming match IDs across nodes"
+    ),
+    node: Optional[str] = typer.Option(
+        None, "--node", help="Name of this node in the lease file (default: host-pid)"
+    ),
+    lease_ttl: float = typer.Option(
+        600.0, "--lease-ttl", help="Seconds before an unfinished claim expires"
+    ),
 ):
     """
     Fetch raw match data for stored PUUIDs.
     """
-    asyncio.run(
-        fetch_matches(
-            file_path=file,
+    try:
+        shard_spec = parse_shard(shard) if shard else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--shard")
+
+    board = LeaseBoard(leases, node, lease_ttl) if leases else None
+    try:
+        asyncio.run(
+            fetch_matches(
+                file_path=file,
+                limit=limit,
+                out_dir=out,
+                concurrency=concurrency,
+                return_cached=False,
+                packed=packed,
+                progress_path=out.parent / PROGRESS_PATH.name,
+                shard=shard_spec,
+                leases=board,
+            )
+        )
+    finally:
+        if board is not None:
+            board.close()
+    typer.echo("Finished fetching matches")
+
+
+@app.command("crawl")
+def crawl_cmd(
+    file: Path = typer.Option(
+        Path("data/raw/players.json"),
+        "--file",
+        "-f",
+        help="Seed players JSON file (output of fetch-ids)",
+    ),
+    depth: int = typer.Option(
+        2, "--depth", "-d", min=0, help="Rounds of expansion beyond the seeds"
+    ),
+    max_players: int = typer.Option(
+        1000, "--max-players", "-m", min=1, help="Players to visit, seeds included"
+    ),
+    limit: int = typer.Option(
+        20, "--limit", "-l", help="Matches per player"
+    ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-j", min=1, help="Concurrent match-detail fetches"
+    ),
+    packed: bool = typer.Option(
+        False, "--packed", help="Store matches in compressed segment files"
+    ),
+    save: Path = typer.Option(
+        Path("data/raw/players_crawl.json"),
+        "--save",
+        help="Where to write the visited players",
+    ),
+):
+    """
+    Fetch matches of the seed players, then snowball through the other
+    participants of those matches.
+    """
+    platform, seeds = load_players_file(file)
+
+    crawled = asyncio.run(
+        crawl(
+            seeds,
+            platform,
+            max_depth=depth,
+            max_players=max_players,
             limit=limit,
+            concurrency=concurrency,
+            packed=packed,
         )
     )
-    typer.echo("Finished fetching matches")
+
+    save.parent.mkdir(parents=True, exist_ok=True)
+    jsonlib.write_json(save, {"platform": platform, "players": crawled}, pretty=True)
+    typer.echo(f"Crawled {len(crawled)} players → {save}")
+
+
+@app.command("collect")
+def collect_cmd(
+    platforms: List[str] = typer.Option(
+        ["na1"],
+        "--platform",
+        "-p",
+        help="Platform shard (na1, euw1, kr, etc); repeat for several",
+    ),
+    count: int = typer.Option(
+        500, "--count", "-c", help="Number of players to fetch per platform"
+    ),
+    limit: int = typer.Option(
+        20, "--limit", "-l", help="Matches per player"
+    ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-j", min=1, help="Concurrent match-detail fetches per region"
+    ),
+    packed: bool = typer.Option(
+        False, "--packed", help="Store matches in compressed segment files"
+    ),
+    out: Path = typer.Option(
+        Path("data/raw"),
+        "--out",
+        "-o",
+        help="Root directory; matches go to {out}/{region}/matches",
+    ),
+):
+    """
+    Fetch players and matches for several platforms at once, one
+    rate-limited pipeline per regional host.
+    """
+    try:
+        group_by_region(platforms)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--platform")
+
+    fetched = asyncio.run(
+        collect(
+            platforms,
+            count=count,
+            limit=limit,
+            out_root=out,
+            concurrency=concurrency,
+            packed=packed,
+        )
+    )
+    for region, n in fetched.items():
+        typer.echo(f"{region}: {n} new matches → {out / region / 'matches'}")
+
+
+@app.command("pack")
+def pack_cmd(
+    raw_dir: Path = typer.Option(
+        Path("data/raw/matches"),
+        "--raw-dir",
+        "-r",
+        help="Directory containing raw match JSON files",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    out: Path = typer.Option(
+        Path("data/raw/packed"),
+        "--out",
+        "-o",
+        help="Packed store directory",
+    ),
+):
+    """
+    Copy raw match JSON files into a compressed packed store.
+    """
+    with PackedMatchStore(out) as store:
+        count = pack_directory(raw_dir, store)
+        total = len(store)
+    typer.echo(f"Packed {count} new matches ({total} total) → {out}")
+
+
+@app.command("merge")
+def merge_cmd(
+    sources: List[Path] = typer.Argument(
+        ...,
+        help="Raw match directories or packed stores (e.g. one per node)",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    out: Path = typer.Option(
+        Path("data/raw/matches"),
+        "--out",
+        "-o",
+        help="Raw store to merge into",
+    ),
+    packed: bool = typer.Option(
+        False, "--packed", help="Create the target as a packed store"
+    ),
+):
+    """
+    Merge raw match stores (e.g. from several collector nodes) into one.
+    """
+    count = merge_stores(sources, out, packed=packed)
+    typer.echo(f"Merged {count} new matches → {out}")
 
 
 @app.command("clean")
@@ -71,7 +337,7 @@ def clean_cmd(
         Path("data/raw/matches"),
         "--raw-dir",
         "-r",
-        help="Directory containing raw match JSON files",
+        help="Directory containing raw match JSON files or a packed store",
         exists=True,
         file_okay=False,
         dir_okay=True,
@@ -88,18 +354,76 @@ def clean_cmd(
         "-p",
         help="Cleaning preset defined in clean_config.py",
     ),
+    workers: int = typer.Option(
+        1, "--workers", "-w", min=1, help="Worker processes for extraction"
+    ),
+    fmt: str = typer.Option(
+        "csv", "--format", help="Output format: csv, parquet or arrow"
+    ),
+    full_rebuild: bool = typer.Option(
+        False,
+        "--full-rebuild",
+        help="Re-clean every raw file instead of only new ones",
+    ),
+    encode: bool = typer.Option(
+        False,
+        "--encode",
+        help="Write players/units/traits/items as integer codes plus dim_* lookup tables",
+    ),
 ):
     """
-    Clean raw match JSON into analysis-ready CSV.
+    Clean raw match JSON into analysis-ready CSV (or parquet / arrow).
     """
+    if fmt not in FORMATS:
+        raise typer.BadParameter(f"expected one of {', '.join(FORMATS)}", param_hint="--format")
     out.parent.mkdir(parents=True, exist_ok=True)
     clean_matches(
         raw_dir=raw_dir,
         out=out,
         preset=preset,
+        workers=workers,
+        fmt=fmt,
+        full_rebuild=full_rebuild,
+        encode=encode,
     )
     typer.echo(f"Saved cleaned data → {out}")
 
 
+@app.command("aggregate")
+def aggregate_cmd(
+    source: Path = typer.Option(
+        Path("data/clean"),
+        "--input",
+        "-i",
+        help="Cleaned output directory, or a raw match directory / packed store",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    out: Path = typer.Option(
+        Path("data/stats"),
+        "--out",
+        "-o",
+        help="Directory for the summary tables",
+    ),
+    fmt: str = typer.Option(
+        "csv", "--format", help="Output format: csv, parquet or arrow"
+    ),
+    min_games: int = typer.Option(
+        1, "--min-games", min=1, help="Leave out keys seen in fewer games"
+    ),
+):
+    """
+    Games, average placement, top-4 and win rates per unit, item, trait
+    tier and unit + item.
+    """
+    if fmt not in FORMATS:
+        raise typer.BadParameter(f"expected one of {', '.join(FORMATS)}", param_hint="--format")
+    written = aggregate(source, out, fmt=fmt, min_games=min_games)
+    for name, count in written.items():
+        typer.echo(f"{name}: {count} rows")
+    typer.echo(f"Saved summaries → {out}")
+
+
 def main():
     app()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Multi-region collection.
+
+Purpose:
+- Collect players and matches for several platforms in one run.
+- Riot rate limits apply per routing host, so every regional host
+  (americas, europe, asia; see utils/routing.py) gets its own worker
+  group: one RiotAPI client + rate limiter fetching match IDs and
+  details, fed by the ladders of the platforms routed to it. The
+  regions run concurrently and never wait on each other's limits.
+
+Output is partitioned by region under `out_root`:
+    {out_root}/players_{platform}.json
+    {out_root}/{region}/matches/              raw matches (or packed store)
+    {out_root}/{region}/match_fetch_log.sqlite
+"""
+
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List
+
+from .fetch_matches import fetch_matches
+from .fetch_puuids import stream_players
+from .riot import RiotAPI
+from .utils import jsonlib
+from .utils.routing import platform_to_region
+
+
+def group_by_region(platforms: Iterable[str]) -> Dict[str, List[str]]:
+    """{region: [platform, ...]}, in first-seen order, without duplicates."""
+    regions: Dict[str, List[str]] = {}
+    for platform in dict.fromkeys(p.lower() for p in platforms):
+        regions.setdefault(platform_to_region(platform), []).append(platform)
+    return regions
+
+
+async def _region_players(
+    platforms: List[str],
+    count: int,
+    saved: Dict[str, List[Dict]],
+) -> AsyncIterator[Dict]:
+    """
+    Merge the ladder streams of `platforms` into one stream of entries
+    tagged with their "platform", keeping a copy of each list in `saved`.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump(platform: str):
+        try:
+            async with RiotAPI(platform) as api:
+                async for entry in stream_players(platform, count, api):
+                    saved[platform].append(entry)
+                    await queue.put({**entry, "platform": platform})
+        except Exception as e:
+            print(f"[warn] failed to fetch players for {platform}: {e}")
+        finally:
+            await queue.put(done)
+
+    for platform in platforms:
+        saved[platform] = []
+    tasks = [asyncio.create_task(pump(p)) for p in platforms]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def collect(
+    platforms: Iterable[str],
+    count: int = 500,
+    limit: int = 20,
+    out_root: Path = Path("data/raw"),
+    concurrency: int = 4,
+    packed: bool = False,
+) -> Dict[str, int]:
+    """
+    Fetch the ladders of `platforms` and the recent matches of their
+    players, one independent pipeline per regional host, all at once.
+
+    Returns {region: matches fetched in this run}.
+    """
+    regions = group_by_region(platforms)
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    async def run_region(region: str, region_platforms: List[str]) -> int:
+        saved: Dict[str, List[Dict]] = {}
+        region_dir = out_root / region
+        region_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            results = await fetch_matches(
+                limit=limit,
+                out_dir=region_dir / "matches",
+                concurrency=concurrency,
+                return_cached=False,
+                packed=packed,
+                players=_region_players(region_platforms, count, saved),
+                platform=region_platforms[0],
+                progress_path=region_dir / "match_fetch_log.sqlite",
+            )
+        finally:
+            for platform, players in saved.items():
+                if players:
+                    jsonlib.write_json(
+                        out_root / f"players_{platform}.json",
+                        {"platform": platform, "players": players},
+                        pretty=True,
+                    )
+        print(f"[{region}] fetched {len(results)} matches")
+        return len(results)
+
+    counts = await asyncio.gather(
+        *(run_region(r, p) for r, p in regions.items()), return_exceptions=True
+    )
+
+    fetched = {}
+    for region, result in zip(regions, counts):
+        if isinstance(result, BaseException):
+            print(f"[warn] collection failed for {region}: {result}")
+            continue
+        fetched[region] = result
+    return fetched
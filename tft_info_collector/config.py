@@ -1,8 +1,16 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     RIOT_API_KEY: str
+    # Assumed app limit until Riot's response headers report the real one.
+    # Default matches a development key; raise it for production keys.
+    RIOT_APP_RATE_LIMIT: str = "20:1,100:120"
+    # Send every request to this host instead of {region}.api.riotgames.com
+    # (a proxy, or the mock server in benchmarks/mock_riot.py).
+    RIOT_API_BASE: Optional[str] = None
 
     class Config:
         env_file = ".env"
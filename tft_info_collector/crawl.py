@@ -0,0 +1,167 @@
+"""
+Snowball crawling.
+
+Purpose:
+- Grow the player set beyond the three league ladders. Every fetched
+  match names its eight players in metadata.participants; the ones not
+  visited yet form the frontier of the next round.
+- Spend the rate-limit budget on match history instead of ladder calls.
+
+The crawl runs breadth-first in rounds: depth 0 is the seed players,
+depth d the players first met in matches of depth d-1. Each round is one
+fetch_matches pass over the chosen players, and all rounds share one rate
+limiter. Matches the players already had from earlier runs are read back
+from the store, so a repeated crawl expands as far as the first one.
+
+The frontier is ordered by how many fetched matches a player appeared in
+(regulars of the seeds' lobbies first), then by when they were first
+seen. `max_depth` and `max_players` bound the crawl.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .config import settings
+from .fetch_matches import PROGRESS_PATH, _aiter, fetch_matches
+from .metrics import metrics
+from .packed_store import open_match_store
+from .progress import FetchProgress
+from .rate_limit import RateLimiter
+from .utils.routing import PLATFORM_TO_REGION, platform_to_region
+
+
+class Frontier:
+    """Players seen in fetched matches but not visited yet, by priority."""
+
+    def __init__(self, visited: Set[str]):
+        self.visited = visited
+        # puuid -> [appearances, first seen, platform]
+        self._seen: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, puuid: str, platform: str):
+        if puuid in self.visited:
+            return
+        entry = self._seen.get(puuid)
+        if entry is None:
+            self._seen[puuid] = [1, len(self._seen), platform]
+        else:
+            entry[0] += 1
+
+    def drain(self) -> List[Tuple[str, str]]:
+        """Remove and return every (puuid, platform) pair, best first."""
+        ranked = sorted(self._seen.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        self._seen = {}
+        return [(puuid, entry[2]) for puuid, entry in ranked]
+
+
+async def crawl(
+    seeds: Iterable,
+    platform: str,
+    max_depth: int = 2,
+    max_players: int = 1000,
+    limit: int = 20,
+    out_dir: Path = Path("data/raw/matches"),
+    concurrency: int = 4,
+    packed: bool = False,
+    progress_path: Path = PROGRESS_PATH,
+) -> List[Dict]:
+    """
+    Fetch the matches of `seeds` (PUUIDs or ladder entries), then of the
+    players met in those matches, round by round.
+
+    Parameters
+    ----------
+    seeds : iterable
+        Starting players (depth 0)
+    platform : str
+        Platform of the seeds (e.g. na1); every crawled player routes to
+        the same regional host
+    max_depth : int
+        Last round to run; 0 only fetches the seeds
+    max_players : int
+        Total number of players visited, seeds included
+    limit, out_dir, concurrency, packed, progress_path
+        As for fetch_matches
+
+    Returns the visited players as {"puuid", "platform", "depth"} dicts,
+    in visiting order.
+    """
+    platform = platform.lower()
+    region = platform_to_region(platform)
+    limiter = RateLimiter(settings.RIOT_APP_RATE_LIMIT)
+
+    visited: Set[str] = set()
+    frontier = Frontier(visited)
+    crawled: List[Dict] = []
+    seen_matches: Set[str] = set()
+
+    def expand(match_id: str, data: dict):
+        if match_id in seen_matches:
+            return
+        seen_matches.add(match_id)
+        match_platform = match_id.split("_", 1)[0].lower() or platform
+        for puuid in data.get("metadata", {}).get("participants", []):
+            frontier.add(puuid, match_platform)
+
+    round_players: List[Tuple[str, str]] = []
+    for seed in seeds:
+        puuid = seed.get("puuid") if isinstance(seed, dict) else seed
+        if puuid and puuid not in visited and len(visited) < max_players:
+            visited.add(puuid)
+            round_players.append((puuid, platform))
+
+    depth = 0
+    while round_players:
+        for puuid, player_platform in round_players:
+            crawled.append({"puuid": puuid, "platform": player_platform, "depth": depth})
+        metrics.inc("crawl_players_total", len(round_players), depth=depth)
+        print(f"[crawl] depth {depth}: {len(round_players)} players")
+
+        await fetch_matches(
+            limit=limit,
+            out_dir=out_dir,
+            concurrency=concurrency,
+            return_cached=False,
+            packed=packed,
+            players=_aiter(
+                {"puuid": puuid, "platform": p} for puuid, p in round_players
+            ),
+            platform=platform,
+            progress_path=progress_path,
+            limiter=limiter,
+            on_match=expand if depth < max_depth else None,
+        )
+
+        depth += 1
+        budget = max_players - len(visited)
+        if depth > max_depth or budget <= 0:
+            break
+
+        # matches fetched before this run never reach on_match
+        with FetchProgress(progress_path) as progress:
+            known = set()
+            for puuid, _ in round_players:
+                known |= progress.match_ids(puuid)
+        known -= seen_matches
+        if known:
+            with open_match_store(out_dir, packed) as store:
+                for match_id in sorted(known):
+                    data = store.get(match_id)
+                    if data is not None:
+                        expand(match_id, data)
+
+        round_players = []
+        for puuid, player_platform in frontier.drain():
+            if len(round_players) >= budget:
+                break
+            # match-v1 is per regional host; stay on the seeds' one
+            if PLATFORM_TO_REGION.get(player_platform) != region:
+                continue
+            visited.add(puuid)
+            round_players.append((puuid, player_platform))
+
+    print(f"[crawl] visited {len(crawled)} players")
+    return crawled
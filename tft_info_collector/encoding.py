@@ -0,0 +1,154 @@
+"""
+Dictionary encoding for cleaned tables.
+
+Purpose:
+- Replace the categorical columns listed in ENCODED_COLUMNS (players,
+  units, traits, items) with small integer codes, so the unit and trait
+  tables stop repeating the same strings millions of times.
+- Write the code -> value lookups as dimension tables next to the
+  region partitions:
+    dim_player.{ext}   code, value (puuid)
+    dim_unit.{ext}     code, value (unit_id)
+    dim_trait.{ext}    code, value (trait_id)
+    dim_item.{ext}     code, value (item name)
+
+Codes are assigned in order of first appearance, starting at 1, and are
+stored in SQLite (_dimensions.sqlite) so they stay stable across
+incremental runs. Encoding always happens in the cleaner's main process;
+worker processes write plain partial tables that are encoded while they
+are merged.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .clean_config import ENCODED_COLUMNS
+from .writers import open_table_writer
+
+DIMENSIONS_NAME = "_dimensions.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dimensions (
+    dimension TEXT    NOT NULL,
+    code      INTEGER NOT NULL,
+    value     TEXT    NOT NULL,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+"""
+
+
+def encoded_column_types(columns: List[str]) -> Dict[str, type]:
+    """Output types of the encoded columns among `columns`."""
+    return {
+        col: str if ENCODED_COLUMNS[col].get("sep") else int
+        for col in columns
+        if col in ENCODED_COLUMNS
+    }
+
+
+class Dimensions:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+        self._codes: Dict[str, Dict[str, int]] = {
+            spec["dimension"]: {} for spec in ENCODED_COLUMNS.values()
+        }
+        for dimension, code, value in self._db.execute(
+            "SELECT dimension, code, value FROM dimensions ORDER BY dimension, code"
+        ):
+            self._codes.setdefault(dimension, {})[value] = code
+        self._new: List[Tuple[str, int, str]] = []
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _add(self, dimension: str, value: str) -> int:
+        codes = self._codes[dimension]
+        code = codes[value] = len(codes) + 1
+        self._new.append((dimension, code, value))
+        return code
+
+    def encoder(self, columns: List[str]):
+        """
+        Return a function that encodes a batch of rows (sequences in
+        `columns` order) and returns the encoded rows.
+        """
+        scalar = []
+        joined = []
+        for i, col in enumerate(columns):
+            spec = ENCODED_COLUMNS.get(col)
+            if spec is None:
+                continue
+            codes = self._codes[spec["dimension"]]
+            if spec.get("sep"):
+                joined.append((i, spec["dimension"], codes, spec["sep"]))
+            else:
+                scalar.append((i, spec["dimension"], codes))
+        add = self._add
+
+        if not scalar and not joined:
+            return lambda rows: rows
+
+        def encode(rows: List[Sequence]) -> List[List]:
+            encoded = []
+            for row in rows:
+                row = list(row)
+                for i, dimension, codes in scalar:
+                    value = row[i]
+                    if value is None or value == "":
+                        row[i] = None
+                    else:
+                        row[i] = codes.get(value) or add(dimension, value)
+                for i, dimension, codes, sep in joined:
+                    value = row[i]
+                    if value:
+                        row[i] = sep.join([
+                            str(codes.get(v) or add(dimension, v))
+                            for v in value.split(sep)
+                        ])
+                encoded.append(row)
+            return encoded
+
+        return encode
+
+    def flush(self):
+        """Persist codes assigned since the last flush."""
+        if not self._new:
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO dimensions (dimension, code, value) VALUES (?, ?, ?)",
+                self._new,
+            )
+        self._new = []
+
+    def write_tables(self, out: Path, fmt: str, dimensions: Optional[List[str]] = None):
+        """Write dim_{dimension}.{ext} lookup tables into `out`."""
+        self.flush()
+        for dimension in dimensions or list(self._codes):
+            writer = open_table_writer(
+                fmt,
+                out,
+                f"dim_{dimension}",
+                ["code", "value"],
+                column_types={"code": int, "value": str},
+            )
+            try:
+                writer.write([
+                    (code, value) for value, code in self._codes[dimension].items()
+                ])
+            finally:
+                writer.close()
@@ -0,0 +1,254 @@
+"""
+Schema compiler for the cleaner.
+
+Purpose:
+- Turn CLEAN_SCHEMAS entries into one specialized extractor function
+  once, so per-row work is direct dict lookups instead of re-interpreting
+  the schema (path parsing, isinstance/callable checks, special cases)
+  for every field of every row.
+- Walk each match exactly once for all requested tables.
+
+The compiler generates Python source: table paths become nested loops
+over a shared path trie, from_root fields are evaluated once per match,
+from_parent fields once per enclosing list element, and each row is a
+single tuple literal of inlined lookups. Only the columns a preset keeps
+are compiled in (projection pushdown), in the preset's column order, so
+rows feed the table writers directly. `MatchExtractor.source` shows the
+result.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .clean_config import STRIP_PREFIX_FIELDS
+
+REGION_SOURCE = "__region__"
+
+
+@lru_cache(maxsize=65536)
+def _strip_str(value: str) -> str:
+    # Units, traits and items are a few hundred distinct strings repeated
+    # across millions of rows: split each once and share one interned copy.
+    return sys.intern(value.rsplit("_", 1)[-1])
+
+
+# ----------------------------
+# Runtime helpers referenced by generated code
+# ----------------------------
+
+def _dig(obj: Any, keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def _strip(value: Any) -> Any:
+    if isinstance(value, str):
+        return _strip_str(value)
+    return value
+
+
+def _join(value: Any, sep: str) -> str:
+    if not isinstance(value, list):
+        return ""
+    return sep.join([v for v in value if isinstance(v, str)])
+
+
+def _join_stripped(value: Any, sep: str) -> str:
+    if not isinstance(value, list):
+        return ""
+    return sep.join([_strip_str(v) for v in value if isinstance(v, str)])
+
+
+def _call(fn: Callable, item: Any, match: Dict) -> Any:
+    try:
+        return fn(item, match)
+    except Exception:
+        return None
+
+
+_HELPERS = {
+    "_dig": _dig,
+    "_strip": _strip,
+    "_join": _join,
+    "_join_stripped": _join_stripped,
+    "_call": _call,
+}
+
+
+# ----------------------------
+# Compiler
+# ----------------------------
+
+def _parse_path(path) -> List[Tuple[str, bool]]:
+    """
+    "info.participants[].units[]" ->
+    [("info", False), ("participants", True), ("units", True)].
+    An empty path is the match itself.
+    """
+    if not isinstance(path, str):
+        path = ".".join(path)
+    if not path:
+        return []
+    return [
+        (part[:-2], True) if part.endswith("[]") else (part, False)
+        for part in path.split(".")
+    ]
+
+
+def _lookup(var: str, path: str) -> str:
+    """Source expression for a dotted lookup on `var`."""
+    keys = path.split(".")
+    if len(keys) == 1:
+        expr = f"{var}.get({keys[0]!r})"
+    else:
+        expr = f"_dig({var}, {tuple(keys)!r})"
+    if keys[-1] in STRIP_PREFIX_FIELDS:
+        expr = f"_strip({expr})"
+    return expr
+
+
+def _field_expr(source: Any, item: str, namespace: Dict[str, Any], i: str) -> str:
+    """Source expression for one field, evaluated against variable `item`."""
+    if callable(source):
+        namespace[f"_fn{i}"] = source
+        return f"_call(_fn{i}, {item}, match)"
+    if source == REGION_SOURCE:
+        return "region"
+    if isinstance(source, str):
+        return _lookup(item, source)
+    if isinstance(source, dict) and "join" in source:
+        spec = source["join"]
+        keys = spec["path"].split(".")
+        join = "_join_stripped" if keys[-1] in STRIP_PREFIX_FIELDS else "_join"
+        value = (
+            f"{item}.get({keys[0]!r})" if len(keys) == 1
+            else f"_dig({item}, {tuple(keys)!r})"
+        )
+        return f"{join}({value}, {spec.get('sep', ';')!r})"
+    return "None"
+
+
+class _Node:
+    """One step of the merged path trie; `var` holds the object reached."""
+
+    def __init__(self, n: int):
+        self.var = f"v{n}" if n else "match"
+        self.list_var = f"l{n}"
+        self.children: Dict[Tuple[str, bool], "_Node"] = {}
+        self.hoisted: List[str] = []
+        self.appends: List[str] = []
+
+
+def _generate(
+    schemas: Dict[str, Dict],
+    columns: Dict[str, List[str]],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Generate the source of `extract(match, region)` for a set of tables.
+
+    Table paths are merged into a trie so shared prefixes (e.g.
+    info.participants[]) are walked once; each table appends its rows at
+    the node its path ends on. Root and parent lookups are hoisted to the
+    node they depend on and shared between tables. Each row is a tuple of
+    the table's `columns`; fields not listed are never evaluated, and
+    listed names the schema does not define are None.
+    """
+    namespace: Dict[str, Any] = dict(_HELPERS)
+    nodes = [_Node(0)]
+    root = nodes[0]
+    hoisted: Dict[Tuple[str, str], str] = {}
+
+    def hoist(node: _Node, expr: str) -> str:
+        key = (node.var, expr)
+        if key not in hoisted:
+            hoisted[key] = f"h{len(hoisted)}"
+            node.hoisted.append(f"{hoisted[key]} = {expr}")
+        return hoisted[key]
+
+    for t, (table_name, schema) in enumerate(schemas.items()):
+        node = root
+        list_nodes: List[_Node] = []
+        for step in _parse_path(schema.get("path", "")):
+            if step not in node.children:
+                nodes.append(_Node(len(nodes)))
+                node.children[step] = nodes[-1]
+            node = node.children[step]
+            if step[1]:
+                list_nodes.append(node)
+        parent = list_nodes[-2] if len(list_nodes) >= 2 else root
+
+        fields = schema.get("fields", {})
+        exprs: List[str] = []
+        for i, col in enumerate(columns[table_name]):
+            source = fields.get(col)
+            if source is None:
+                exprs.append("None")
+            elif isinstance(source, dict) and "from_root" in source:
+                exprs.append(hoist(root, _lookup("match", source["from_root"])))
+            elif isinstance(source, dict) and "from_parent" in source:
+                exprs.append(hoist(parent, _lookup(parent.var, source["from_parent"])))
+            else:
+                exprs.append(_field_expr(source, node.var, namespace, f"{t}_{i}"))
+
+        node.appends.append(f"append{t}(({''.join(e + ', ' for e in exprs)}))")
+
+    lines = ["def extract(match, region=None):"]
+
+    def emit(depth: int, line: str):
+        lines.append("    " * depth + line)
+
+    def emit_node(node: _Node, depth: int):
+        for line in node.hoisted + node.appends:
+            emit(depth, line)
+        for (key, is_list), child in node.children.items():
+            if is_list:
+                emit(depth, f"{child.list_var} = {node.var}.get({key!r})")
+                emit(depth, f"if isinstance({child.list_var}, list):")
+                emit(depth + 1, f"for {child.var} in {child.list_var}:")
+                emit(depth + 2, f"if isinstance({child.var}, dict):")
+                emit_node(child, depth + 3)
+            else:
+                emit(depth, f"{child.var} = {node.var}.get({key!r})")
+                emit(depth, f"if isinstance({child.var}, dict):")
+                emit_node(child, depth + 1)
+
+    for t in range(len(schemas)):
+        emit(1, f"rows{t} = []")
+        emit(1, f"append{t} = rows{t}.append")
+    emit_node(root, 1)
+    emit(1, "return " + "".join(f"rows{t}, " for t in range(len(schemas))))
+    return "\n".join(lines) + "\n", namespace
+
+
+class MatchExtractor:
+    """
+    Precompiled single-pass extractor for a set of CLEAN_SCHEMAS tables.
+
+    Calling it with a match (and optionally the match's region) walks the
+    match once and returns {table: rows}, each row a tuple in the order of
+    `self.columns[table]`. Only the tables it was built with are
+    extracted, and only the given `columns` of each (default: every
+    schema field).
+    """
+
+    def __init__(
+        self,
+        schemas: Dict[str, Dict],
+        columns: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.tables = list(schemas)
+        columns = columns or {}
+        self.columns = {
+            name: list(columns.get(name) or schema.get("fields", {}))
+            for name, schema in schemas.items()
+        }
+        self.source, namespace = _generate(schemas, self.columns)
+        exec(compile(self.source, "<extract>", "exec"), namespace)
+        self._fn = namespace["extract"]
+
+    def __call__(self, match: Dict, region: Optional[str] = None) -> Dict[str, List[Tuple]]:
+        return dict(zip(self.tables, self._fn(match, region)))
@@ -1,45 +1,28 @@
-import json
 import asyncio
-import time
 from pathlib import Path
-from typing import Iterable, Union, Optional, Dict
-
+from typing import (
+    AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Set, Tuple,
+)
+
+from .metrics import metrics
+from .packed_store import open_match_store
+from .progress import FetchProgress
+from .rate_limit import RateLimiter
 from .riot import RiotAPI
+from .sharding import LeaseBoard, Shard, in_shard
+from .utils import jsonlib
 from .utils.routing import platform_to_region
 
+PROGRESS_PATH = Path("data/raw/match_fetch_log.sqlite")
+# Legacy whole-file log; imported into PROGRESS_PATH on first run.
 LOG_PATH = Path("data/raw/match_fetch_log.json")
+# Largest `count` requested from the match IDs endpoint in one call.
+IDS_PAGE_SIZE = 200
 
 
-async def fetch_matches(
-    file_path: Path,
-    limit: int = 20,
-    out_dir: Path = Path("data/raw/matches"),
-    sleep_ids: float = 0.6,
-    sleep_matches: float = 1.2,
-):
-    """
-    Fetch TFT match data for a list of players.
-
-    Parameters
-    ----------
-    ids_path : Path
-        Path to JSON file containing player IDs and platform
-    limit : int
-        Number of matches to fetch per player
-    out_dir : Path
-        Directory to store raw match JSON files
-    sleep_ids : float
-        Delay between match-id requests
-    sleep_matches : float
-        Delay between match-detail requests
-    """
-
-    raw = json.loads(file_path.read_text())
-
-    if LOG_PATH.exists():
-        fetch_log = json.loads(LOG_PATH.read_text())
-    else:
-        fetch_log = {}
+def load_players_file(file_path: Path) -> Tuple[str, List]:
+    """Read a fetch-ids output file; returns (platform, players)."""
+    raw = jsonlib.read_json(file_path)
 
     if not isinstance(raw, dict):
         raise ValueError(
@@ -53,105 +36,312 @@ async def fetch_matches(
         raise ValueError(
             "IDs JSON must include both 'platform' and 'players' fields."
         )
+    return platform, players
 
-    region = platform_to_region(platform)
 
-    puuids: list[str] = []
-    for p in players:
-        if isinstance(p, str):
-            puuids.append(p)
-        elif isinstance(p, dict) and "puuid" in p:
-            puuids.append(p["puuid"])
+def _puuid_of(player) -> Optional[str]:
+    if isinstance(player, str):
+        return player
+    if isinstance(player, dict):
+        return player.get("puuid")
+    return None
 
-    puuids = list(dict.fromkeys(puuids))  # de-duplicate, preserve order
 
-    api = RiotAPI(region)
+async def _aiter(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
 
-    async def safe_get(
-        url: str,
-        params: Optional[Dict] = None,
-        retries: int = 5,
-    ):
-        for attempt in range(retries):
-            try:
-                return await api.get(url, params=params)
-            except Exception as e:
-                msg = str(e)
-                if "429" in msg:
-                    wait = max(5, 2 ** attempt)
-                    print(f"[rate-limit] hit 429, sleeping {wait}s (retry {attempt+1}/{retries})")
-                    await asyncio.sleep(wait)
-                    continue
-                raise
-        raise RuntimeError("Exceeded retry limit due to rate limiting")
 
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    all_match_ids: set[str] = set()
-
-    # ----------------------------------------
-    # 1. Fetch match IDs
-    # ----------------------------------------
-    for puuid in puuids:
-        logged = fetch_log.get(puuid, {})
-        logged_ids = set(logged.get("fetched_match_ids", []))
+async def fetch_match_ids(
+    api: RiotAPI,
+    puuid: str,
+    limit: int,
+    known: Set[str],
+    watermark: Optional[int] = None,
+) -> List[str]:
+    """
+    IDs among the newest `limit` matches of `puuid` that are not in
+    `known`, newest first.
 
-        if len(logged_ids) >= limit:
-            print(f"[skip] {puuid} already fetched ({len(logged_ids)})")
+    With a watermark (game_datetime in ms of the newest match we already
+    have) only games played since then are listed, via `startTime`, so a
+    refresh usually costs one small request. Windows larger than
+    IDS_PAGE_SIZE are paged with `start`.
+    """
+    path = f"/tft/match/v1/matches/by-puuid/{puuid}/ids"
+    mode = "full" if watermark is None else "incremental"
+    new_ids: List[str] = []
+    seen = set(known)
+    start = 0
+
+    while start < limit:
+        count = min(IDS_PAGE_SIZE, limit - start)
+        params = {"start": start, "count": count}
+        if watermark is not None:
+            # startTime is in seconds and inclusive; the overlap with the
+            # last run is filtered out through `known`
+            params["startTime"] = watermark // 1000
+        page = await api.get(path, params=params)
+        metrics.inc("fetch_id_requests_total", mode=mode)
+
+        for mid in page:
+            if mid not in seen:
+                seen.add(mid)
+                new_ids.append(mid)
+        if len(page) < count:
+            break
+        start += count
+
+    return new_ids
+
+
+def _resume_listed(progress: FetchProgress, cache) -> List[str]:
+    """
+    Date listed matches that are stored but missing from the log, and
+    return the listed ones that are not stored yet (their detail fetch
+    failed, lost a lease, or never ran before the process stopped).
+    """
+    dated = []
+    pending = []
+    for match_id in progress.undated_match_ids():
+        if match_id not in cache:
+            pending.append(match_id)
             continue
+        data = cache.get(match_id)
+        game_datetime = data and data.get("info", {}).get("game_datetime")
+        if game_datetime:
+            dated.append((match_id, game_datetime))
+    if dated:
+        progress.add_game_datetimes(dated)
+        print(f"[backfill] dated {len(dated)} stored matches")
+    return pending
 
-        try:
-            match_ids = await safe_get(
-                f"/tft/match/v1/matches/by-puuid/{puuid}/ids",
-                params={"count": limit},
-            )
-            new_ids = [mid for mid in match_ids if mid not in logged_ids]
 
-            fetch_log.setdefault(puuid, {
-                "platform": platform,
-                "fetched_match_ids": []
-            })["fetched_match_ids"].extend(new_ids)
-
-            all_match_ids.update(new_ids)
+async def fetch_matches(
+    file_path: Optional[Path] = None,
+    limit: int = 20,
+    out_dir: Path = Path("data/raw/matches"),
+    concurrency: int = 4,
+    return_cached: bool = True,
+    packed: bool = False,
+    players: Optional[AsyncIterable] = None,
+    platform: Optional[str] = None,
+    progress_path: Path = PROGRESS_PATH,
+    limiter: Optional[RateLimiter] = None,
+    on_match: Optional[Callable[[str, dict], None]] = None,
+    shard: Optional[Shard] = None,
+    leases: Optional[LeaseBoard] = None,
+):
+    """
+    Fetch TFT match data for a list of players.
 
-            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-            LOG_PATH.write_text(json.dumps(fetch_log, indent=2))
+    Runs as a producer/consumer pipeline: match IDs discovered for each
+    player are queued for the detail workers immediately, while the
+    remaining players are still being enumerated.
 
-        except Exception as e:
-            print(f"[warn] failed to fetch match IDs for {puuid}: {e}")
+    Parameters
+    ----------
+    file_path : Path
+        Path to JSON file containing player IDs and platform
+    limit : int
+        Number of matches to fetch per player
+    out_dir : Path
+        Directory to store raw match JSON files (or the packed store)
+    concurrency : int
+        Number of workers fetching match details at once. All workers
+        share one client and rate limiter, so this only needs to be high
+        enough to hide per-request latency.
+    return_cached : bool
+        Whether matches already in the cache are loaded into the return
+        value. Pass False when only the files on disk matter; cache hits
+        are then answered from the index without reading the file,
+        unless the progress log lacks the match's game_datetime (needed
+        for watermarks), in which case it is read once to record it.
+    packed : bool
+        Store matches in a compressed packed store (see packed_store.py)
+        instead of one JSON file each. An `out_dir` that already holds a
+        packed store is always used as one.
+    players : AsyncIterable, optional
+        Stream of PUUIDs (or ladder entries with a "puuid") to use instead
+        of `file_path`, e.g. fetch_puuids.stream_players(...). Players are
+        processed as they arrive, so ladder and match fetching overlap.
+        Entries may carry their own "platform"; all streamed players must
+        route to the same region as `platform`.
+    platform : str, optional
+        Platform of the streamed players (e.g. na1); picks the regional
+        host used for match-v1.
+    progress_path : Path
+        SQLite file recording which matches each player already has.
+    limiter : RateLimiter, optional
+        Rate limiter to share with other calls against the same host
+        (e.g. successive crawl rounds); a fresh one is used if not given.
+    on_match : callable, optional
+        Called as on_match(match_id, data) for every match queued in this
+        run, whether downloaded or found in the cache.
+    shard : (int, int), optional
+        (K, N): only handle players whose PUUID hashes to shard K of N,
+        so N collectors can split one players file (see sharding.py).
+    leases : LeaseBoard, optional
+        Shared lease file through which match IDs are claimed before
+        downloading, so collectors never download the same match twice.
+        Matches claimed by another node are left to it for this run;
+        later runs try them again, so a crashed node's expired claims
+        are picked up, while finished ones stay skipped.
+
+    Players with a watermark in the progress log (see progress.py) are
+    refreshed incrementally: only their newest `limit` matches played
+    since the watermark are listed. Players without one get their newest
+    `limit` matches listed again. Listed matches that are already in the
+    store but have no game_datetime in the log (logs from before
+    watermarks, imported JSON logs, stores filled by `merge`) are dated
+    from the store first, so their players get a watermark. Listed
+    matches that are not stored yet are queued again before any player
+    is listed, so failed or interrupted downloads resume.
+    """
+    if players is None:
+        if file_path is None:
+            raise ValueError("either file_path or players is required")
+        platform, listed = load_players_file(file_path)
+        players = _aiter(listed)
+    elif not platform:
+        raise ValueError("platform is required when streaming players")
 
-        await asyncio.sleep(sleep_ids)
+    region = platform_to_region(platform)
 
-    # ----------------------------------------
-    # 2. Fetch match details (cached)
-    # ----------------------------------------
-    results: list[dict] = []
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    progress = FetchProgress(progress_path)
+    if progress.is_empty() and LOG_PATH.exists():
+        progress.import_json_log(LOG_PATH)
+
+    async with RiotAPI(
+        region, max_connections=max(20, concurrency), limiter=limiter
+    ) as api:
+
+        cache = open_match_store(out_dir, packed)
+        pending = _resume_listed(progress, cache)
+
+        all_match_ids: set[str] = set(pending)
+        results: list[dict] = []
+        queue: asyncio.Queue = asyncio.Queue()
+        for mid in pending:
+            queue.put_nowait(mid)
+        if pending:
+            print(f"[resume] {len(pending)} listed matches not stored yet")
+
+        # ----------------------------------------
+        # Producer: discover match IDs per player and hand new ones
+        # straight to the detail workers
+        # ----------------------------------------
+        async def discover_ids():
+            seen: set[str] = set()
+            async for player in players:
+                puuid = _puuid_of(player)
+                if not puuid or puuid in seen:
+                    continue
+                seen.add(puuid)
+                if not in_shard(puuid, shard):
+                    continue
+                player_platform = platform
+                if isinstance(player, dict):
+                    player_platform = player.get("platform") or platform
+
+                logged_ids = progress.match_ids(puuid)
+                watermark = progress.watermark(puuid)
+
+                try:
+                    new_ids = await fetch_match_ids(
+                        api, puuid, limit, logged_ids, watermark
+                    )
+
+                    progress.add_player_matches(puuid, player_platform, new_ids)
+
+                    for mid in new_ids:
+                        if mid not in all_match_ids:
+                            all_match_ids.add(mid)
+                            queue.put_nowait(mid)
+                    metrics.set_gauge("fetch_queue_depth", queue.qsize())
+
+                except Exception as e:
+                    metrics.inc("fetch_errors_total", stage="ids")
+                    print(f"[warn] failed to fetch match IDs for {puuid}: {e}")
+
+        # ----------------------------------------
+        # Consumers: fetch match details (cached)
+        # ----------------------------------------
+        def record(match_id: str, data: dict):
+            progress.add_match(
+                match_id,
+                data.get("metadata", {}).get("participants", []),
+                data.get("info", {}).get("game_datetime"),
+            )
 
-    for match_id in all_match_ids:
-        out_file = out_dir / f"{match_id}.json"
+        async def fetch_detail(match_id: str):
+            if match_id in cache:
+                if (
+                    not return_cached
+                    and on_match is None
+                    and progress.has_game_datetime(match_id)
+                ):
+                    metrics.inc("fetch_cache_lookups_total", result="hit")
+                    return
+                data = cache.get(match_id)
+                if data is not None:
+                    metrics.inc("fetch_cache_lookups_total", result="hit")
+                    if return_cached:
+                        results.append(data)
+                    record(match_id, data)
+                    if on_match is not None:
+                        on_match(match_id, data)
+                    return
+                # corrupted cache → refetch
+            metrics.inc("fetch_cache_lookups_total", result="miss")
+
+            if leases is not None and not leases.claim(match_id):
+                metrics.inc("fetch_lease_conflicts_total")
+                return
 
-        if out_file.exists():
             try:
-                results.append(json.loads(out_file.read_text()))
-                continue
-            except Exception:
-                pass  # corrupted cache → refetch
+                data = await api.get(f"/tft/match/v1/matches/{match_id}")
+                cache.put(match_id, data)
+                if leases is not None:
+                    leases.complete(match_id)
+                results.append(data)
+                record(match_id, data)
+                if on_match is not None:
+                    on_match(match_id, data)
+                metrics.inc("fetch_matches_total")
 
+            except Exception as e:
+                if leases is not None:
+                    leases.release(match_id)
+                metrics.inc("fetch_errors_total", stage="match")
+                print(f"[warn] failed to fetch match {match_id}: {e}")
+
+        async def worker():
+            while True:
+                match_id = await queue.get()
+                metrics.set_gauge("fetch_queue_depth", queue.qsize())
+                try:
+                    await fetch_detail(match_id)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
         try:
-            data = await safe_get(f"/tft/match/v1/matches/{match_id}")
-            out_file.write_text(json.dumps(data))
-            results.append(data)
-
-            for p in data.get("metadata", {}).get("participants", []):
-                if p in fetch_log:
-                    if match_id not in fetch_log[p]["fetched_match_ids"]:
-                        fetch_log[p]["fetched_match_ids"].append(match_id)
-
-            LOG_PATH.write_text(json.dumps(fetch_log, indent=2))
-
-        except Exception as e:
-            print(f"[warn] failed to fetch match {match_id}: {e}")
-
-        await asyncio.sleep(sleep_matches)
-
-    return results
\ No newline at end of file
+            await discover_ids()
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            progress.close()
+            cache.close()
+
+            hits = metrics.value("fetch_cache_lookups_total", result="hit")
+            misses = metrics.value("fetch_cache_lookups_total", result="miss")
+            if hits + misses:
+                metrics.set_gauge("fetch_cache_hit_ratio", hits / (hits + misses))
+
+        return results
\ No newline at end of file
@@ -1,47 +1,95 @@
-import os
-import requests
-from dotenv import load_dotenv
-from typing import List, Dict
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Optional
 
-load_dotenv()
-
-API_KEY = os.getenv("RIOT_API_KEY")
-if not API_KEY:
-    raise RuntimeError("RIOT_API_KEY not set")
+from .riot import RiotAPI
 
 LEAGUE_ENDPOINTS = ["challenger", "grandmaster", "master"]
 
-BASE_URL = "https://{platform}.api.riotgames.com/tft/league/v1/{endpoint}"
-HEADERS = {"X-Riot-Token": API_KEY}
 
+async def fetch_league(api: RiotAPI, endpoint: str) -> Dict:
+    return await api.get(f"/tft/league/v1/{endpoint}")
 
-def fetch_league(platform: str, endpoint: str) -> Dict:
-    url = BASE_URL.format(platform=platform, endpoint=endpoint)
-    resp = requests.get(url, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
 
+async def stream_players(
+    platform: str,
+    max_count: int,
+    api: Optional[RiotAPI] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Yield up to `max_count` ladder entries of one platform, challenger
+    first, then grandmaster, then master.
 
-def collect_players(platform: str, max_count: int) -> List[Dict]:
-    collected: List[Dict] = []
-    counts_by_rank: Dict[str, int] = {}
+    All three ladders are requested at once through `api` (a client for
+    the platform host; one is opened if not given). Entries of a tier are
+    yielded as soon as that tier and the ones above it have arrived, and
+    ladders that are no longer needed are cancelled.
+    """
+    own_api = api is None
+    if own_api:
+        api = RiotAPI(platform.lower())
 
-    for endpoint in LEAGUE_ENDPOINTS:
-        data = fetch_league(platform, endpoint)
-        entries = data.get("entries", [])
-        counts_by_rank[endpoint] = 0
+    tasks = [
+        asyncio.ensure_future(fetch_league(api, endpoint))
+        for endpoint in LEAGUE_ENDPOINTS
+    ]
+    try:
+        total = 0
+        for endpoint, task in zip(LEAGUE_ENDPOINTS, tasks):
+            data = await task
+            count = 0
+            for entry in data.get("entries", []):
+                if total >= max_count:
+                    break
+                yield entry
+                count += 1
+                total += 1
 
-        for entry in entries:
-            collected.append(entry)
-            counts_by_rank[endpoint] += 1
+            print(f"[{platform}] {endpoint.capitalize()}: {count} players retrieved")
 
-            if len(collected) >= max_count:
+            if total >= max_count:
                 break
 
-        print(f"{endpoint.capitalize()}: {counts_by_rank[endpoint]} players retrieved")
+        print(f"[{platform}] Total players retrieved: {total}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if own_api:
+            await api.aclose()
+
+
+async def collect_players(
+    platform: str,
+    max_count: int,
+    api: Optional[RiotAPI] = None,
+) -> List[Dict]:
+    return [entry async for entry in stream_players(platform, max_count, api)]
+
+
+async def collect_players_many(
+    platforms: Iterable[str],
+    max_count: int,
+) -> Dict[str, List[Dict]]:
+    """
+    Collect the ladders of several platforms concurrently, each through
+    its own pooled client and rate limiter (limits are per platform host).
+    A platform that fails is reported and left out of the result, so
+    callers must check which platforms are missing.
+    """
+    platforms = list(dict.fromkeys(p.lower() for p in platforms))
+
+    async def one(platform: str) -> List[Dict]:
+        async with RiotAPI(platform) as api:
+            return await collect_players(platform, max_count, api)
 
-        if len(collected) >= max_count:
-            break
+    results = await asyncio.gather(
+        *(one(p) for p in platforms), return_exceptions=True
+    )
 
-    print(f"Total players retrieved: {len(collected)}")
-    return collected
\ No newline at end of file
+    players = {}
+    for platform, result in zip(platforms, results):
+        if isinstance(result, BaseException):
+            print(f"[warn] failed to fetch players for {platform}: {result}")
+            continue
+        players[platform] = result
+    return players
@@ -0,0 +1,118 @@
+"""
+Raw match cache.
+
+Purpose:
+- Store one {match_id}.json per match under the raw matches directory
+  (the layout the cleaner reads).
+- Keep a SQLite index of which match IDs are present, so "do we already
+  have match X?" never stats or parses a file.
+
+The index lives next to the files (_index.sqlite). When it is first
+created it is seeded from a single directory listing, so existing caches
+are picked up without re-reading any match.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from .utils import jsonlib
+
+INDEX_NAME = "_index.sqlite"
+
+
+class MatchCache:
+    def __init__(self, root: Path):
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+
+        index_path = root / INDEX_NAME
+        seed = not index_path.exists()
+
+        self._db = sqlite3.connect(str(index_path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS matches (match_id TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        if seed:
+            self._seed_from_directory()
+
+    def _seed_from_directory(self):
+        with os.scandir(self.root) as entries:
+            ids = [
+                (e.name[:-5],) for e in entries
+                if e.name.endswith(".json") and e.is_file()
+            ]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO matches (match_id) VALUES (?)", ids
+            )
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, match_id: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM matches WHERE match_id = ?", (match_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def path(self, match_id: str) -> Path:
+        return self.root / f"{match_id}.json"
+
+    def get(self, match_id: str) -> Optional[Dict]:
+        """
+        Load a cached match. Missing or corrupted files are dropped from
+        the index and reported as None so the caller can refetch.
+        """
+        try:
+            return jsonlib.read_json(self.path(match_id))
+        except Exception:
+            self.discard(match_id)
+            return None
+
+    def put(self, match_id: str, data: Dict):
+        """Write a match atomically, then index it."""
+        self.put_raw(match_id, jsonlib.dumps(data))
+
+    def put_raw(self, match_id: str, payload: bytes):
+        """Like put(), for a match given as JSON bytes."""
+        out_file = self.path(match_id)
+        tmp = out_file.with_suffix(".tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, out_file)
+        self._db.execute(
+            "INSERT OR IGNORE INTO matches (match_id) VALUES (?)", (match_id,)
+        )
+
+    def scan_raw(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Yield (match_id, JSON bytes) for every {match_id}.json in the
+        directory. Lists the files rather than the index, which misses
+        files copied in after it was seeded (e.g. by rsync).
+        """
+        with os.scandir(self.root) as entries:
+            ids = sorted(
+                e.name[:-5] for e in entries
+                if e.name.endswith(".json") and e.is_file()
+            )
+        for match_id in ids:
+            try:
+                yield match_id, self.path(match_id).read_bytes()
+            except OSError:
+                self.discard(match_id)
+
+    def discard(self, match_id: str):
+        self._db.execute("DELETE FROM matches WHERE match_id = ?", (match_id,))
@@ -0,0 +1,221 @@
+"""
+In-process metrics.
+
+Purpose:
+- Count and time the hot paths (API requests, rate limiting, the fetch
+  queue and cache, the cleaner's read / decode / extract / write phases)
+  without changing what the commands print.
+- Export everything at the end of a command as a JSON summary or in the
+  Prometheus text format (see the --metrics option of the CLI).
+
+Metrics are keyed by name plus labels:
+    counter    monotonically increasing float (counts, seconds spent)
+    gauge      last value plus the maximum seen (queue depth, ratios)
+    histogram  fixed buckets plus count / sum / min / max (latencies)
+
+`metrics` is the process-wide registry. Worker processes send back
+`snapshot()` and the parent folds it in with `merge()`.
+"""
+
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# seconds; an implicit +Inf bucket follows
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram"):
+        if other.buckets != self.buckets:
+            raise ValueError("cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6),
+            "min": round(self.min, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.counters: Dict[Key, float] = {}
+        self.gauges: Dict[Key, List[float]] = {}  # [last, max]
+        self.histograms: Dict[Key, Histogram] = {}
+
+    # ---- recording ----
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        gauge = self.gauges.get(key)
+        if gauge is None:
+            self.gauges[key] = [value, value]
+        else:
+            gauge[0] = value
+            if value > gauge[1]:
+                gauge[1] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(value)
+
+    def value(self, name: str, **labels) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        return self.counters.get(_key(name, labels), 0)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Add the wall time of the block to counter `name` (seconds)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc(name, time.perf_counter() - start, **labels)
+
+    # ---- combining ----
+
+    def snapshot(self) -> Dict:
+        """Picklable copy of every metric, for merge() in another process."""
+        return {
+            "counters": dict(self.counters),
+            "gauges": {k: list(v) for k, v in self.gauges.items()},
+            "histograms": dict(self.histograms),
+        }
+
+    def merge(self, snapshot: Dict):
+        for key, value in snapshot["counters"].items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, (last, peak) in snapshot["gauges"].items():
+            gauge = self.gauges.setdefault(key, [last, peak])
+            gauge[0] = last
+            gauge[1] = max(gauge[1], peak)
+        for key, hist in snapshot["histograms"].items():
+            if key in self.histograms:
+                self.histograms[key].merge(hist)
+            else:
+                self.histograms[key] = hist
+
+    # ---- export ----
+
+    def summary(self, **extra) -> Dict:
+        return {
+            **extra,
+            "elapsed_seconds": round(time.time() - self.started, 3),
+            "counters": {
+                _format_key(k): round(v, 6) for k, v in sorted(self.counters.items())
+            },
+            "gauges": {
+                _format_key(k): {"value": v[0], "max": v[1]}
+                for k, v in sorted(self.gauges.items())
+            },
+            "histograms": {
+                _format_key(k): h.summary() for k, h in sorted(self.histograms.items())
+            },
+        }
+
+    def prometheus(self, prefix: str = "tft_") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        def family(metrics, kind):
+            last = None
+            for key in sorted(metrics):
+                name = prefix + key[0]
+                if name != last:
+                    lines.append(f"# TYPE {name} {kind}")
+                    last = name
+                yield name, key[1], metrics[key]
+
+        def labels(pairs, extra=()):
+            pairs = list(pairs) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        for name, pairs, value in family(self.counters, "counter"):
+            lines.append(f"{name}{labels(pairs)} {value:g}")
+        for name, pairs, (value, _) in family(self.gauges, "gauge"):
+            lines.append(f"{name}{labels(pairs)} {value:g}")
+        for name, pairs, hist in family(self.histograms, "histogram"):
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (math.inf,), hist.counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{name}_bucket{labels(pairs, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{labels(pairs)} {hist.sum:g}")
+            lines.append(f"{name}_count{labels(pairs)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,264 @@
+"""
+Packed raw match store.
+
+Purpose:
+- Store raw matches in a handful of compressed segment files instead of
+  one {match_id}.json per match (no inode explosion, no huge glob()).
+- Keep random access by match ID and fast sequential scans.
+
+Layout (inside the store directory):
+    seg-000001.jsonl.zst   concatenated compressed frames, one per match
+    seg-000002.jsonl.zst   (a new segment starts past SEGMENT_BYTES)
+    _packed_index.sqlite   match_id -> (segment, offset, length)
+
+Every match is its own zstd frame (gzip member when zstandard is not
+installed), holding one JSON line. Frames can be decoded individually
+for random access, and a whole segment decompresses with standard tools
+(`zstd -dc seg-000001.jsonl.zst`) into plain JSONL.
+"""
+
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .match_cache import MatchCache
+from .utils import jsonlib
+
+INDEX_NAME = "_packed_index.sqlite"
+
+SEGMENT_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS matches (
+    match_id TEXT PRIMARY KEY,
+    seq      INTEGER NOT NULL,
+    segment  INTEGER NOT NULL,
+    offset   INTEGER NOT NULL,
+    length   INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS matches_location ON matches (segment, offset);
+"""
+
+
+def is_packed_store(path: Path) -> bool:
+    return (path / INDEX_NAME).exists()
+
+
+def open_match_store(root: Path, packed: bool = False):
+    """The packed store in `root` if asked for or present, else a MatchCache."""
+    if packed or is_packed_store(root):
+        return PackedMatchStore(root)
+    return MatchCache(root)
+
+
+class _Codec:
+    def __init__(self, name: str):
+        self.name = name
+        if name == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError(
+                    "this store is zstd-compressed; install zstandard "
+                    "(pip install 'tft-info-collector[zstd]')"
+                )
+            self._compressor = zstandard.ZstdCompressor(level=3)
+            self._decompressor = zstandard.ZstdDecompressor()
+            self.suffix = ".jsonl.zst"
+        elif name == "gzip":
+            self.suffix = ".jsonl.gz"
+        else:
+            raise ValueError(f"Unknown codec: {name}")
+
+    @staticmethod
+    def default() -> str:
+        try:
+            import zstandard  # noqa: F401
+            return "zstd"
+        except ImportError:
+            return "gzip"
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._compressor.compress(data)
+        c = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip member
+        return c.compress(data) + c.flush()
+
+    def decompress(self, frame: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._decompressor.decompress(frame)
+        return zlib.decompress(frame, 31)
+
+
+class PackedMatchStore:
+    """
+    Append-only packed store with the same interface as MatchCache
+    (`in`, get, put, discard, len) plus ordered scans.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        codec: Optional[str] = None,
+        segment_bytes: int = SEGMENT_BYTES,
+    ):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        root.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(str(root / INDEX_NAME), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        if "codec" not in meta:
+            meta["codec"] = codec or _Codec.default()
+            self._db.execute(
+                "INSERT INTO meta (key, value) VALUES ('codec', ?)", (meta["codec"],)
+            )
+        self._codec = _Codec(meta["codec"])
+
+        self._seq, last_segment = self._db.execute(
+            "SELECT COALESCE(MAX(seq), 0), COALESCE(MAX(segment), 1) FROM matches"
+        ).fetchone()
+        self._segment = last_segment
+        self._writer = None
+        self._readers: Dict[int, object] = {}
+
+    # ---- lifecycle ----
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for f in self._readers.values():
+            f.close()
+        self._readers.clear()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- index ----
+
+    def segment_path(self, segment: int) -> Path:
+        return self.root / f"seg-{segment:06d}{self._codec.suffix}"
+
+    def __contains__(self, match_id: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM matches WHERE match_id = ?", (match_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def discard(self, match_id: str):
+        self._db.execute("DELETE FROM matches WHERE match_id = ?", (match_id,))
+
+    def entries(self) -> Iterator[Tuple[str, int, int]]:
+        """(match_id, seq, length) for every match, in storage order."""
+        return iter(self._db.execute(
+            "SELECT match_id, seq, length FROM matches ORDER BY segment, offset"
+        ).fetchall())
+
+    # ---- write ----
+
+    def _open_writer(self, size: int):
+        if self._writer is None:
+            self._writer = open(self.segment_path(self._segment), "ab")
+        pos = self._writer.tell()
+        if pos and pos + size > self.segment_bytes:
+            self._writer.close()
+            self._segment += 1
+            self._writer = open(self.segment_path(self._segment), "ab")
+        return self._writer
+
+    def put_raw(self, match_id: str, payload: bytes):
+        """Append one match given as JSON bytes (without trailing newline)."""
+        frame = self._codec.compress(payload + b"\n")
+        writer = self._open_writer(len(frame))
+        offset = writer.tell()
+        writer.write(frame)
+        writer.flush()
+
+        self._seq += 1
+        self._db.execute(
+            "INSERT OR REPLACE INTO matches (match_id, seq, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (match_id, self._seq, self._segment, offset, len(frame)),
+        )
+
+    def put(self, match_id: str, data: Dict):
+        self.put_raw(match_id, jsonlib.dumps(data))
+
+    # ---- read ----
+
+    def _read_frame(self, segment: int, offset: int, length: int) -> bytes:
+        if self._writer is not None and segment == self._segment:
+            self._writer.flush()
+        f = self._readers.get(segment)
+        if f is None:
+            f = self._readers[segment] = open(self.segment_path(segment), "rb")
+        f.seek(offset)
+        return self._codec.decompress(f.read(length))
+
+    def get_raw(self, match_id: str) -> Optional[bytes]:
+        row = self._db.execute(
+            "SELECT segment, offset, length FROM matches WHERE match_id = ?",
+            (match_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return self._read_frame(*row)
+
+    def get(self, match_id: str) -> Optional[Dict]:
+        """
+        Load a stored match. Unreadable records are dropped from the
+        index and reported as None so the caller can refetch.
+        """
+        try:
+            payload = self.get_raw(match_id)
+            return None if payload is None else jsonlib.loads(payload)
+        except Exception:
+            self.discard(match_id)
+            return None
+
+    def scan_raw(self, match_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, bytes]]:
+        """
+        Yield (match_id, JSON bytes) in storage order, so segments are
+        read front to back. Restricted to `match_ids` when given.
+        """
+        rows = self._db.execute(
+            "SELECT match_id, segment, offset, length FROM matches ORDER BY segment, offset"
+        ).fetchall()
+        if match_ids is not None:
+            wanted = set(match_ids)
+            rows = [r for r in rows if r[0] in wanted]
+        for match_id, segment, offset, length in rows:
+            yield match_id, self._read_frame(segment, offset, length)
+
+
+def pack_directory(src: Path, store: PackedMatchStore) -> int:
+    """Copy every {match_id}.json in `src` into `store`; returns the count."""
+    count = 0
+    for json_file in sorted(src.glob("*.json")):
+        if json_file.stem in store:
+            continue
+        payload = json_file.read_bytes().strip()
+        if b"\n" in payload:  # pretty-printed; keep one match per line
+            payload = jsonlib.dumps(jsonlib.loads(payload))
+        store.put_raw(json_file.stem, payload)
+        count += 1
+    return count
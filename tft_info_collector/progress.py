@@ -0,0 +1,186 @@
+"""
+Durable fetch progress.
+
+Purpose:
+- Record which match IDs each player has been credited with, so
+  fetch_matches can skip finished players and resume after a crash.
+- Replace the old match_fetch_log.json, which was rewritten in full
+  after every player and every match.
+- Give every player a watermark: the game_datetime (ms) of the newest
+  fetched match that came from the player's own match ID listing.
+  Everything up to it is known, so refresh runs only ask Riot for newer
+  match IDs. Matches credited through another player's game do not move
+  the watermark, since the player's own history may still have gaps.
+
+Backed by SQLite in WAL mode: every insert is O(1), lookups go through
+primary-key indexes, and a crash can lose at most the last transaction.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .utils import jsonlib
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    puuid    TEXT PRIMARY KEY,
+    platform TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS player_matches (
+    puuid    TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    listed   INTEGER NOT NULL DEFAULT 1,  -- 0: credited via add_match
+    PRIMARY KEY (puuid, match_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS matches (
+    match_id      TEXT PRIMARY KEY,
+    game_datetime INTEGER
+) WITHOUT ROWID;
+"""
+
+
+class FetchProgress:
+    """
+    Per-player fetch progress stored in a SQLite file.
+
+    Usable as a context manager; closing checkpoints the WAL.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a log file was created."""
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(player_matches)")}
+        if "listed" not in columns:
+            self._db.execute(
+                "ALTER TABLE player_matches ADD COLUMN listed INTEGER NOT NULL DEFAULT 1"
+            )
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_empty(self) -> bool:
+        return self._db.execute("SELECT 1 FROM players LIMIT 1").fetchone() is None
+
+    def is_known(self, puuid: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM players WHERE puuid = ?", (puuid,)
+        ).fetchone()
+        return row is not None
+
+    def match_ids(self, puuid: str) -> Set[str]:
+        rows = self._db.execute(
+            "SELECT match_id FROM player_matches WHERE puuid = ?", (puuid,)
+        )
+        return {r[0] for r in rows}
+
+    def has_game_datetime(self, match_id: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM matches WHERE match_id = ?", (match_id,)
+        ).fetchone()
+        return row is not None
+
+    def undated_match_ids(self) -> List[str]:
+        """
+        Listed match IDs without a recorded game_datetime, e.g. from logs
+        written before watermarks existed or from import_json_log().
+        """
+        rows = self._db.execute(
+            "SELECT DISTINCT pm.match_id FROM player_matches pm "
+            "LEFT JOIN matches m ON m.match_id = pm.match_id "
+            "WHERE pm.listed = 1 AND m.match_id IS NULL"
+        )
+        return [r[0] for r in rows]
+
+    def add_game_datetimes(self, dated: Iterable[Tuple[str, int]]):
+        """Record (match_id, game_datetime) pairs, e.g. read back from the store."""
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO matches (match_id, game_datetime) VALUES (?, ?)",
+                dated,
+            )
+
+    def watermark(self, puuid: str) -> Optional[int]:
+        """
+        game_datetime (ms) of the newest fetched match from the player's
+        own listing, or None if there is none yet.
+        """
+        row = self._db.execute(
+            "SELECT MAX(m.game_datetime) FROM player_matches pm "
+            "JOIN matches m ON m.match_id = pm.match_id "
+            "WHERE pm.puuid = ? AND pm.listed = 1",
+            (puuid,),
+        ).fetchone()
+        return row[0]
+
+    def add_player_matches(self, puuid: str, platform: str, match_ids: Iterable[str]):
+        """
+        Register `puuid` and credit it with `match_ids` (taken from its own
+        match ID listing) in one transaction.
+        """
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT OR IGNORE INTO players (puuid, platform) VALUES (?, ?)",
+                (puuid, platform),
+            )
+            self._db.executemany(
+                "INSERT INTO player_matches (puuid, match_id, listed) VALUES (?, ?, 1) "
+                "ON CONFLICT (puuid, match_id) DO UPDATE SET listed = 1",
+                ((puuid, mid) for mid in match_ids),
+            )
+
+    def add_match(
+        self,
+        match_id: str,
+        participants: Iterable[str],
+        game_datetime: Optional[int] = None,
+    ):
+        """
+        Record a fetched match and its game_datetime (ms), and credit it
+        to every participant we already track (players outside the
+        tracked set are ignored).
+        """
+        participants = list(participants)
+        with self._db:
+            self._db.execute("BEGIN")
+            if game_datetime:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO matches (match_id, game_datetime) "
+                    "VALUES (?, ?)",
+                    (match_id, game_datetime),
+                )
+            if participants:
+                marks = ",".join("?" * len(participants))
+                self._db.execute(
+                    "INSERT OR IGNORE INTO player_matches (puuid, match_id, listed) "
+                    f"SELECT puuid, ?, 0 FROM players WHERE puuid IN ({marks})",
+                    (match_id, *participants),
+                )
+
+    def import_json_log(self, log_path: Path):
+        """Load a legacy match_fetch_log.json into this store."""
+        fetch_log = jsonlib.read_json(log_path)
+        for puuid, entry in fetch_log.items():
+            self.add_player_matches(
+                puuid,
+                entry.get("platform"),
+                entry.get("fetched_match_ids", []),
+            )
@@ -0,0 +1,198 @@
+"""
+Riot API rate limiting.
+
+Purpose:
+- Track the application and per-method rate limits Riot reports for a
+  routing host (X-App-Rate-Limit, X-Method-Rate-Limit and their -Count
+  headers) and let requests through as fast as that budget allows.
+- Honor Retry-After on 429 responses instead of guessing with fixed sleeps.
+
+Riot limits look like "20:1,100:120": at most 20 requests per second
+and 100 per two minutes. Each "limit:seconds" pair is tracked by its own
+RateLimitBucket; a request is released only when every bucket of both the
+application scope and the endpoint's method scope has room.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+# Path segments that identify a resource rather than an endpoint
+# (PUUIDs, match IDs, summoner IDs, ...). Collapsed so that every match
+# detail call shares a single method bucket.
+_VARIABLE_SEGMENT = re.compile(r"^(?:[\w-]{40,}|(?=.*\d)[\w-]{12,})$")
+
+
+def method_key(endpoint: str) -> str:
+    """
+    Reduce a request path to the Riot method it belongs to.
+
+    Example:
+      /tft/match/v1/matches/NA1_5123456789 -> /tft/match/v1/matches/{}
+    """
+    path = endpoint.split("?", 1)[0]
+    return "/".join(
+        "{}" if _VARIABLE_SEGMENT.match(part) else part
+        for part in path.split("/")
+    )
+
+
+def parse_rate_limits(header: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    Parse a Riot rate-limit header ("20:1,100:120") into
+    [(count, seconds), ...]. Malformed entries are ignored.
+    """
+    limits = []
+    if not header:
+        return limits
+    for pair in header.split(","):
+        count, _, seconds = pair.strip().partition(":")
+        try:
+            limits.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+    return limits
+
+
+class RateLimitBucket:
+    """
+    Allows at most `limit` requests in any rolling `window` seconds.
+
+    A rolling log is stricter than Riot's fixed windows, so staying within
+    it guarantees we never exceed the server-side count.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._stamps: Deque[float] = deque()
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._stamps and self._stamps[0] <= cutoff:
+            self._stamps.popleft()
+
+    def wait_time(self, now: float) -> float:
+        self._expire(now)
+        if len(self._stamps) < self.limit:
+            return 0.0
+        return self._stamps[len(self._stamps) - self.limit] + self.window - now
+
+    def consume(self, now: float):
+        self._stamps.append(now)
+
+    def sync(self, count: int, now: float):
+        """
+        Reconcile with the server's count for this window. If the server
+        has seen more requests than we have (another process sharing the
+        key), record the difference as happening now.
+        """
+        self._expire(now)
+        missing = count - len(self._stamps)
+        for _ in range(missing):
+            self._stamps.append(now)
+
+
+class RateLimiter:
+    """
+    Rate limiter for one routing host.
+
+    Starts from `default_app_limits` until the first response tells us the
+    real application limits, then follows the headers. Method limits are
+    learned per endpoint as responses arrive.
+    """
+
+    def __init__(
+        self,
+        default_app_limits: str = "20:1,100:120",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._app: List[RateLimitBucket] = self._buckets(
+            parse_rate_limits(default_app_limits), []
+        )
+        self._methods: Dict[str, List[RateLimitBucket]] = {}
+        self._app_blocked_until = 0.0
+        self._method_blocked_until: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _buckets(
+        limits: List[Tuple[int, int]],
+        current: List[RateLimitBucket],
+    ) -> List[RateLimitBucket]:
+        existing = {(b.limit, b.window): b for b in current}
+        return [existing.get((c, s)) or RateLimitBucket(c, s) for c, s in limits]
+
+    def _wait_time(self, method: str, now: float) -> float:
+        wait = max(
+            self._app_blocked_until - now,
+            self._method_blocked_until.get(method, 0.0) - now,
+            0.0,
+        )
+        for bucket in self._app + self._methods.get(method, []):
+            wait = max(wait, bucket.wait_time(now))
+        return wait
+
+    async def acquire(self, method: str):
+        """Wait until both the app and `method` budgets allow one request."""
+        while True:
+            async with self._lock:
+                now = self._clock()
+                wait = self._wait_time(method, now)
+                if wait <= 0:
+                    for bucket in self._app + self._methods.get(method, []):
+                        bucket.consume(now)
+                    return
+            await asyncio.sleep(wait)
+
+    def update(self, method: str, headers: Mapping[str, str]):
+        """Adopt the limits and counts reported in a response's headers."""
+        now = self._clock()
+
+        app_limits = parse_rate_limits(headers.get("X-App-Rate-Limit"))
+        if app_limits:
+            self._app = self._buckets(app_limits, self._app)
+        self._sync(self._app, headers.get("X-App-Rate-Limit-Count"), now)
+
+        method_limits = parse_rate_limits(headers.get("X-Method-Rate-Limit"))
+        if method_limits:
+            self._methods[method] = self._buckets(
+                method_limits, self._methods.get(method, [])
+            )
+        self._sync(
+            self._methods.get(method, []),
+            headers.get("X-Method-Rate-Limit-Count"),
+            now,
+        )
+
+    @staticmethod
+    def _sync(buckets: List[RateLimitBucket], header: Optional[str], now: float):
+        counts = {seconds: count for count, seconds in parse_rate_limits(header)}
+        for bucket in buckets:
+            if bucket.window in counts:
+                bucket.sync(counts[bucket.window], now)
+
+    def backoff(self, method: str, headers: Mapping[str, str], attempt: int) -> float:
+        """
+        Record a 429 and return how long the caller should wait.
+
+        Retry-After blocks the scope named by X-Rate-Limit-Type
+        (application or method). Service-level 429s carry no Retry-After,
+        so they fall back to exponential backoff on the method only.
+        """
+        now = self._clock()
+        try:
+            wait = float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            wait = float(min(2 ** attempt, 60))
+
+        if headers.get("X-Rate-Limit-Type", "").lower() == "application":
+            self._app_blocked_until = max(self._app_blocked_until, now + wait)
+        else:
+            self._method_blocked_until[method] = max(
+                self._method_blocked_until.get(method, 0.0), now + wait
+            )
+        return wait
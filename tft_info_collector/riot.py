@@ -1,15 +1,107 @@
+import time
+
 import httpx
+from typing import Optional
+
 from .config import settings
+from .metrics import metrics
+from .rate_limit import RateLimiter, method_key
+from .utils import jsonlib
+
 
 class RiotAPI:
-    def __init__(self, region: str):
+    """
+    Thin async client for a single Riot routing host (e.g. americas, na1).
+
+    Owns one long-lived, pooled ``httpx.AsyncClient`` so connections are
+    kept alive (and multiplexed over HTTP/2 when ``h2`` is installed)
+    across requests, and paces every call through a RateLimiter fed by
+    Riot's rate-limit headers. Use as an async context manager:
+
+        async with RiotAPI("americas") as api:
+            await api.get("/tft/match/v1/matches/NA1_123")
+    """
+
+    def __init__(
+        self,
+        region: str,
+        base: Optional[str] = None,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        limiter: Optional[RateLimiter] = None,
+    ):
         self.region = region
-        self.base = f"https://{region}.api.riotgames.com"
+        self.base = (
+            base or settings.RIOT_API_BASE or f"https://{region}.api.riotgames.com"
+        )
         self.key = settings.RIOT_API_KEY
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.limiter = limiter or RateLimiter(settings.RIOT_APP_RATE_LIMIT)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _make_client(self) -> httpx.AsyncClient:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+
+        return httpx.AsyncClient(
+            base_url=self.base,
+            headers={"X-Riot-Token": self.key},
+            http2=http2,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=60.0,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._make_client()
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        self.client
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def get(self, endpoint: str, params: dict = None, retries: int = 5):
+        method = method_key(endpoint)
+
+        for attempt in range(retries):
+            start = time.perf_counter()
+            await self.limiter.acquire(method)
+            sent = time.perf_counter()
+            metrics.inc("rate_limit_wait_seconds_total", sent - start, endpoint=method)
+
+            r = await self.client.get(endpoint, params=params)
+            metrics.observe("riot_request_seconds", time.perf_counter() - sent, endpoint=method)
+            metrics.inc("riot_requests_total", endpoint=method, status=r.status_code)
+            self.limiter.update(method, r.headers)
+
+            if r.status_code == 429:
+                wait = self.limiter.backoff(method, r.headers, attempt)
+                limit_type = r.headers.get("X-Rate-Limit-Type", "service")
+                metrics.inc("riot_rate_limited_total", endpoint=method, type=limit_type)
+                print(
+                    f"[rate-limit] 429 ({limit_type}) on {method}, "
+                    f"retry in {wait:g}s ({attempt+1}/{retries})"
+                )
+                continue
 
-    async def get(self, endpoint: str, params: dict = None):
-        headers = {"X-Riot-Token": self.key}
-        async with httpx.AsyncClient() as client:
-            r = await client.get(self.base + endpoint, headers=headers, params=params)
             r.raise_for_status()
-            return r.json()
\ No newline at end of file
+            return jsonlib.loads(r.content)
+
+        raise RuntimeError("Exceeded retry limit due to rate limiting")
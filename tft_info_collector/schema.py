@@ -5,7 +5,9 @@ These schemas define how raw Riot match data can be
 normalized into CSV-friendly tables.
 
 They are NOT enforced automatically — they serve as
-contracts for cleaners and downstream analytics.
+contracts for cleaners and downstream analytics. The columnar
+writers (parquet / arrow) take their column types from here via
+TABLE_ROW_TYPES.
 """
 
 from typing import TypedDict, List
@@ -23,13 +25,16 @@ class MatchRow(TypedDict):
     game_version: str
     queue_id: int
     set_number: int
+    set_name: str
 
 
 class ParticipantRow(TypedDict):
     match_id: str
+    region: str
     puuid: str
     placement: int
     level: int
+    last_round: int
     gold_left: int
     win: bool
 
@@ -48,6 +53,7 @@ class TraitRow(TypedDict):
     puuid: str
     trait_id: str
     tier_current: int
+    tier_total: int
     style: int
     num_units: int
 
@@ -71,4 +77,13 @@ class ParticipantProfileRow(TypedDict):
     region: str
     companion_species: str
     companion_skin_id: int
-    companion_item_id: int
\ No newline at end of file
+    companion_item_id: int
+
+
+# Row contract for each CLEAN_SCHEMAS table
+TABLE_ROW_TYPES = {
+    "match": MatchRow,
+    "participant": ParticipantRow,
+    "unit": UnitRow,
+    "trait": TraitRow,
+}
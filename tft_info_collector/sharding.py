@@ -0,0 +1,134 @@
+"""
+Running several collectors side by side.
+
+Purpose:
+- Let collectors on different hosts (each with its own API key) share
+  one players file without duplicating work:
+    * players are split deterministically by a hash of the PUUID
+      (`--shard K/N`: node K of N, counting from 0), so every node lists
+      match IDs for a disjoint set of players;
+    * match IDs are claimed through expiring leases in a shared SQLite
+      file (`--leases PATH`), since players of different shards meet in
+      the same matches. A claim lasts `ttl` seconds; a finished match
+      stays claimed for good, and leases of a crashed node expire.
+- Merge the per-node raw stores into one store for the cleaner.
+
+The lease file must live where every node can lock it: a local disk for
+several processes on one machine, or a network filesystem with working
+POSIX locks. It uses a rollback journal rather than WAL for that reason.
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from .packed_store import open_match_store
+
+Shard = Tuple[int, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    key     TEXT    PRIMARY KEY,
+    node    TEXT    NOT NULL,
+    expires REAL    NOT NULL,
+    done    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse "K/N" (0 <= K < N) into (K, N)."""
+    try:
+        k, n = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise ValueError(f"expected K/N, got {value!r}")
+    if not 0 <= k < n:
+        raise ValueError(f"shard index must be in 0..{n - 1}, got {k}")
+    return k, n
+
+
+def shard_of(key: str, count: int) -> int:
+    """Stable shard number of `key` (the same on every host and run)."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def in_shard(key: str, shard: Optional[Shard]) -> bool:
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+
+def default_node() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseBoard:
+    """
+    Expiring work claims shared between nodes through one SQLite file.
+
+    claim() is a single atomic upsert: it succeeds if the key is new,
+    already held by this node, or held by a lease that has expired, and
+    never once the key is done.
+    """
+
+    def __init__(self, path: Path, node: Optional[str] = None, ttl: float = 600.0):
+        self.path = path
+        self.node = node or default_node()
+        self.ttl = ttl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None, timeout=30.0)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def claim(self, key: str) -> bool:
+        now = time.time()
+        cur = self._db.execute(
+            "INSERT INTO leases (key, node, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET node = excluded.node, expires = excluded.expires "
+            "WHERE leases.done = 0 AND (leases.node = excluded.node OR leases.expires < ?)",
+            (key, self.node, now + self.ttl, now),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, key: str):
+        """Mark a claimed key as done; no node will claim it again."""
+        self._db.execute(
+            "UPDATE leases SET done = 1 WHERE key = ? AND node = ?", (key, self.node)
+        )
+
+    def release(self, key: str):
+        """Give up a claim (e.g. after a failure) so another node can retry."""
+        self._db.execute(
+            "DELETE FROM leases WHERE key = ? AND node = ? AND done = 0",
+            (key, self.node),
+        )
+
+
+def merge_stores(sources: Iterable[Path], dest: Path, packed: bool = False) -> int:
+    """
+    Copy every match of the raw stores in `sources` (JSON directories or
+    packed stores) that `dest` lacks into `dest`. Returns the count.
+    """
+    count = 0
+    with open_match_store(dest, packed) as out:
+        for src in sources:
+            if src.resolve() == dest.resolve():
+                continue
+            with open_match_store(src) as store:
+                for match_id, payload in store.scan_raw():
+                    if match_id in out:
+                        continue
+                    out.put_raw(match_id, payload)
+                    count += 1
+    return count
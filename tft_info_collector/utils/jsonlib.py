@@ -0,0 +1,91 @@
+"""
+JSON backend selection.
+
+Purpose:
+- Route every JSON encode/decode on the fetch, cache and clean paths
+  through the fastest library available: orjson, then ujson, then the
+  standard library.
+- Work on bytes end to end (HTTP bodies, files, packed frames), so no
+  intermediate str copies are made.
+
+Set TFT_JSON_BACKEND=orjson|ujson|json to force a backend (e.g. when
+benchmarking).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+
+def _select(preferred: str = ""):
+    order = ["orjson", "ujson", "json"]
+    if preferred in order:
+        order.remove(preferred)
+        order.insert(0, preferred)
+
+    for name in order:
+        if name == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+
+            def loads(data):
+                return orjson.loads(data)
+
+            def dumps(obj, pretty=False):
+                return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+            return name, loads, dumps
+
+        if name == "ujson":
+            try:
+                import ujson
+            except ImportError:
+                continue
+
+            def loads(data):
+                return ujson.loads(data)
+
+            def dumps(obj, pretty=False):
+                text = ujson.dumps(
+                    obj,
+                    indent=2 if pretty else 0,
+                    ensure_ascii=False,
+                    escape_forward_slashes=False,
+                )
+                return text.encode()
+
+            return name, loads, dumps
+
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj, pretty=False):
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    return "json", loads, dumps
+
+
+BACKEND, _loads, _dumps = _select(os.environ.get("TFT_JSON_BACKEND", ""))
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes (preferred) or str."""
+    return _loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Encode to UTF-8 JSON bytes; compact unless `pretty`."""
+    return _dumps(obj, pretty)
+
+
+def read_json(path: Path) -> Any:
+    return _loads(path.read_bytes())
+
+
+def write_json(path: Path, obj: Any, pretty: bool = False):
+    path.write_bytes(_dumps(obj, pretty))
@@ -0,0 +1,292 @@
+"""
+Table writers for the cleaner.
+
+Purpose:
+- Write one output file per cleaned table in the chosen format:
+    csv      plain text, header row from the preset columns
+    parquet  typed, zstd-compressed columnar file (one row group per batch)
+    arrow    typed Arrow IPC file (one record batch per batch)
+- Merge per-worker partial files into the final table file, and append
+  newly cleaned rows to an existing table file.
+
+Column types for the columnar formats come from the TypedDicts in
+schema.py (TABLE_ROW_TYPES), unless overridden per column (e.g. for
+integer-coded columns, see encoding.py); columns without a declared type
+are written as strings. Rows are sequences (tuples from the extractor)
+in the writer's column order. They are buffered only up to `batch_size`,
+so memory stays bounded for any dataset size.
+
+pyarrow is optional and only imported for the columnar formats.
+"""
+
+import csv
+import os
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, get_type_hints
+
+from .schema import TABLE_ROW_TYPES
+
+FORMATS = ("csv", "parquet", "arrow")
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+DEFAULT_BATCH_SIZE = 65536
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError(
+            "pyarrow is required for parquet/arrow output "
+            "(pip install 'tft-info-collector[arrow]')"
+        )
+    return pyarrow
+
+
+def arrow_schema(
+    table_name: str,
+    columns: List[str],
+    column_types: Optional[Dict[str, type]] = None,
+):
+    """
+    Arrow schema for `columns` of `table_name`, typed from schema.py and
+    `column_types` (which takes precedence).
+    """
+    pa = _pyarrow()
+    types = {int: pa.int64(), float: pa.float64(), str: pa.string(), bool: pa.bool_()}
+    row_type = TABLE_ROW_TYPES.get(table_name)
+    hints = get_type_hints(row_type) if row_type else {}
+    hints.update(column_types or {})
+    return pa.schema([
+        pa.field(col, types.get(hints.get(col), pa.string())) for col in columns
+    ])
+
+
+class CsvTableWriter:
+    def __init__(self, path: Path, table_name: str, columns: List[str]):
+        self.path = path
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows: List[Sequence]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowTableWriter:
+    """Buffers rows into record batches for parquet or Arrow IPC files."""
+
+    def __init__(
+        self,
+        path: Path,
+        table_name: str,
+        columns: List[str],
+        fmt: str = "parquet",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        column_types: Optional[Dict[str, type]] = None,
+    ):
+        pa = _pyarrow()
+        self.path = path
+        self.columns = columns
+        self.batch_size = batch_size
+        self.schema = arrow_schema(table_name, columns, column_types)
+        self._pa = pa
+        self._buffer: List[Sequence] = []
+
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(
+                str(path), self.schema, compression="zstd"
+            )
+        else:
+            self._writer = pa.ipc.new_file(
+                str(path),
+                self.schema,
+                options=pa.ipc.IpcWriteOptions(compression="zstd"),
+            )
+
+    def write(self, rows: List[Sequence]):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        batch = self._pa.RecordBatch.from_arrays(
+            [
+                self._pa.array(values, type=field.type)
+                for values, field in zip(zip(*self._buffer), self.schema)
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def _open_writer(
+    fmt: str,
+    path: Path,
+    table_name: str,
+    columns: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    column_types: Optional[Dict[str, type]] = None,
+):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (expected one of {FORMATS})")
+    if fmt == "csv":
+        return CsvTableWriter(path, table_name, columns)
+    return ArrowTableWriter(path, table_name, columns, fmt, batch_size, column_types)
+
+
+def open_table_writer(
+    fmt: str,
+    out_dir: Path,
+    table_name: str,
+    columns: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    column_types: Optional[Dict[str, type]] = None,
+):
+    """Create out_dir/{table_name}.{ext} and return a writer for it."""
+    path = out_dir / f"{table_name}{EXTENSIONS.get(fmt, '')}"
+    return _open_writer(fmt, path, table_name, columns, batch_size, column_types)
+
+
+def read_table_columns(fmt: str, path: Path) -> List[str]:
+    """Column names of a table file, in file order."""
+    if fmt == "csv":
+        with open(path, "r", newline="") as f:
+            return next(csv.reader(f), [])
+
+    pa = _pyarrow()
+    if fmt == "parquet":
+        return list(pa.parquet.ParquetFile(str(path)).schema_arrow.names)
+    with pa.memory_map(str(path)) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def iter_table_rows(
+    fmt: str,
+    path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[List[Sequence]]:
+    """
+    Read a table file back as lists of rows in file column order, one
+    batch at a time. CSV values come back as strings.
+    """
+    if fmt == "csv":
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            while True:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    return
+                yield rows
+
+    pa = _pyarrow()
+
+    def to_rows(batch):
+        return list(zip(*(column.to_pylist() for column in batch.columns)))
+
+    if fmt == "parquet":
+        for batch in pa.parquet.ParquetFile(str(path)).iter_batches(batch_size):
+            yield to_rows(batch)
+    else:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield to_rows(reader.get_batch(i))
+
+
+def merge_table_files(
+    fmt: str,
+    parts: List[Path],
+    dest: Path,
+    table_name: str,
+    columns: List[str],
+    column_types: Optional[Dict[str, type]] = None,
+    transform: Optional[Callable[[List[Sequence]], List[Sequence]]] = None,
+):
+    """
+    Concatenate table files written by `open_table_writer` into `dest`,
+    in the given order, streaming one batch (or CSV chunk) at a time.
+
+    With `transform`, every batch of rows is passed through it on the way
+    (decoded and re-encoded rather than copied).
+    """
+    if transform is not None:
+        writer = _open_writer(fmt, dest, table_name, columns, column_types=column_types)
+        try:
+            for part in parts:
+                for rows in iter_table_rows(fmt, part):
+                    writer.write(transform(rows))
+        finally:
+            writer.close()
+        return
+
+    if fmt == "csv":
+        with open(dest, "w", newline="") as dst:
+            csv.writer(dst).writerow(columns)
+            for part in parts:
+                with open(part, "r", newline="") as src:
+                    src.readline()  # header
+                    shutil.copyfileobj(src, dst)
+        return
+
+    pa = _pyarrow()
+    schema = arrow_schema(table_name, columns, column_types)
+    if fmt == "parquet":
+        with pa.parquet.ParquetWriter(str(dest), schema, compression="zstd") as writer:
+            for part in parts:
+                source = pa.parquet.ParquetFile(str(part))
+                for i in range(source.num_row_groups):
+                    writer.write_table(source.read_row_group(i))
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(str(dest), schema, options=options) as writer:
+            for part in parts:
+                with pa.memory_map(str(part)) as source:
+                    reader = pa.ipc.open_file(source)
+                    for i in range(reader.num_record_batches):
+                        writer.write_batch(reader.get_batch(i))
+
+
+def append_table_file(
+    fmt: str,
+    part: Path,
+    dest: Path,
+    table_name: str,
+    columns: List[str],
+    column_types: Optional[Dict[str, type]] = None,
+):
+    """
+    Add the rows of table file `part` to the end of `dest` (moving `part`
+    into place if `dest` does not exist yet). CSV rows are appended in
+    place; columnar files are rewritten batch by batch next to `dest`
+    and swapped in.
+    """
+    if not dest.exists():
+        os.replace(part, dest)
+        return
+
+    if fmt == "csv":
+        with open(dest, "a", newline="") as dst, open(part, "r", newline="") as src:
+            src.readline()  # header
+            shutil.copyfileobj(src, dst)
+        return
+
+    merged = dest.with_name(dest.name + ".tmp")
+    merge_table_files(fmt, [dest, part], merged, table_name, columns, column_types)
+    os.replace(merged, dest)